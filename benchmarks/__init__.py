@@ -0,0 +1 @@
+"""Medición de tiempos y memoria del motor de cálculo."""
@@ -0,0 +1,136 @@
+"""Comprueba que los botones de descarga generen su libro fuera del script.
+
+Uso::
+
+    python -m benchmarks.descargas
+
+Corre el dashboard con ``AppTest``, registra dos licenciaturas, recorre las
+secciones con "Todas" y con una licenciatura (incluidos riesgo y
+optimización) y ejecuta cada descarga diferida en un hilo aparte, sin
+``ScriptRunContext``, como lo hace Streamlit al hacer clic. Ahí
+``st.session_state`` no está disponible: si una función la lee, falla.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.testing.v1 import AppTest
+
+
+DASHBOARD = Path(__file__).resolve().parent.parent / "dashboard_equilibrio.py"
+LICENCIATURAS = (("Derecho", 60, 3_000.0), ("Medicina", 80, 2_500.0))
+
+
+def _registrar_diferidas(diferidas):
+    # AppTest descarta su Runtime al terminar cada corrida; se guardan las
+    # funciones registradas por los botones para llamarlas después.
+    original = MediaFileManager.add_deferred
+
+    def add_deferred(self, data_callable, *args, **kwargs):
+        file_id = original(self, data_callable, *args, **kwargs)
+        diferidas[file_id] = data_callable
+        return file_id
+
+    MediaFileManager.add_deferred = add_deferred
+    return original
+
+
+def _correr(at):
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+def _botones(at, donde, pendientes):
+    for boton in at.get("download_button"):
+        if boton.proto.deferred_file_id:
+            pendientes.append((f"{donde}: {boton.proto.label}", boton.proto.deferred_file_id))
+
+
+def _en_hilo(funcion):
+    resultado = {}
+
+    def correr():
+        try:
+            resultado["datos"] = funcion()
+        except Exception as error:
+            resultado["error"] = error
+
+    hilo = threading.Thread(target=correr)
+    hilo.start()
+    hilo.join()
+    return resultado
+
+
+def recorrer(at, pendientes):
+    """Llena el dashboard y anota los botones de descarga de cada vista."""
+    _correr(at)
+    for nombre, estudiantes, colegiatura in LICENCIATURAS:
+        at.text_input(key="nombre_licenciatura").set_value(nombre)
+        at.number_input(key="num_aulas").set_value(3)
+        at.number_input(key="capacidad_aula").set_value(30)
+        at.number_input(key="estudiantes_actuales").set_value(estudiantes)
+        at.number_input(key="costo_fijo_total").set_value(100_000.0)
+        at.number_input(key="costo_variable").set_value(20_000.0)
+        at.number_input(key="colegiatura_manual").set_value(colegiatura)
+        at.button[0].click()
+        _correr(at)
+        _botones(at, f"Punto de Equilibrio ({nombre})", pendientes)
+
+    at.sidebar.radio[0].set_value("🧪 Simulaciones")
+    _correr(at)
+    for seleccion in ("Todas", LICENCIATURAS[0][0]):
+        at.selectbox[0].set_value(seleccion)
+        _correr(at)
+        _botones(at, f"Simulaciones ({seleccion})", pendientes)
+
+    at.sidebar.radio[0].set_value("📈 Proyección")
+    _correr(at)
+    at.toggle(key="proy_riesgo").set_value(True)
+    at.toggle(key="proy_optimizar").set_value(True)
+    _correr(at)
+    at.select_slider(key="proy_simulaciones").set_value(1_000)
+    for seleccion in ("Todas", LICENCIATURAS[0][0]):
+        at.selectbox[0].set_value(seleccion)
+        _correr(at)
+        _botones(at, f"Proyección ({seleccion})", pendientes)
+
+
+def verificar(informar=print):
+    """Devuelve el número de descargas que fallan o no generan un libro."""
+    diferidas, pendientes = {}, []
+    original = _registrar_diferidas(diferidas)
+    try:
+        with tempfile.TemporaryDirectory() as directorio:
+            # La ruta se fija al importar equilibrio.almacen, que ocurre
+            # dentro de la corrida; así no se escribe en el almacén real.
+            os.environ["EQUILIBRIO_ALMACEN"] = os.path.join(directorio, "almacen.sqlite")
+            recorrer(AppTest.from_file(str(DASHBOARD), default_timeout=120), pendientes)
+    finally:
+        MediaFileManager.add_deferred = original
+
+    fallas = 0
+    for etiqueta, file_id in pendientes:
+        resultado = _en_hilo(diferidas[file_id])
+        datos = resultado.get("datos")
+        if "error" in resultado:
+            fallas += 1
+            informar(f"{etiqueta}: {resultado['error']!r}")
+        elif not isinstance(datos, bytes) or not datos.startswith(b"PK"):
+            fallas += 1
+            informar(f"{etiqueta}: no devolvió un libro de Excel")
+    informar(f"{len(pendientes)} descargas, {fallas} con errores.")
+    return fallas
+
+
+def main(argv=None):
+    argparse.ArgumentParser(prog="python -m benchmarks.descargas", description=__doc__.splitlines()[0]).parse_args(argv)
+    return 1 if verificar() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
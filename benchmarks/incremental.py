@@ -0,0 +1,145 @@
+"""Comprueba que la cartera incremental coincida con el recálculo completo.
+
+Uso::
+
+    python -m benchmarks.incremental --operaciones 300 --semilla 0
+
+Aplica al registro una secuencia aleatoria de altas, ediciones (con y sin
+cambios), cargas en bloque, bajas y vaciados, sincroniza los bloques cada
+pocas operaciones y compara tablas, agregados y resumen con
+``simular_cartera``, ``proyectar_cartera`` y ``resumen_proyeccion_cartera``.
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from equilibrio.incremental import ProyeccionIncremental, SimulacionIncremental
+from equilibrio.motor import proyectar_cartera, resumen_proyeccion_cartera, simular_cartera, valores_variacion
+from equilibrio.registro import COLUMNAS_REGISTRO, RegistroLicenciaturas
+
+
+NOMBRES_POSIBLES = 40
+HORIZONTE = 24
+TASA_MATRICULA = 0.5
+TASA_COSTOS = 2.0
+
+
+def fila_aleatoria(rng):
+    capacidad = int(rng.integers(10, 500))
+    estudiantes = int(rng.integers(0, capacidad + 1))
+    colegiatura = float(np.round(rng.uniform(500, 5_000), 2))
+    costo_fijo = float(np.round(rng.uniform(1e4, 1e6), 2))
+    costo_variable = float(np.round(rng.uniform(0, 1e5), 2))
+    ingresos = estudiantes * colegiatura
+    egresos = costo_fijo + costo_variable
+    return {
+        "Estudiantes": estudiantes,
+        "Capacidad": capacidad,
+        "Colegiatura": colegiatura,
+        "Costo Fijo": costo_fijo,
+        "Costo Variable": costo_variable,
+        "PE Alumnos": int(rng.integers(0, capacidad + 1)),
+        "Ingresos Totales": ingresos,
+        "Egresos Totales": egresos,
+        "Utilidad Neta": ingresos - egresos,
+    }
+
+
+def operar(registro, rng):
+    """Aplica una operación aleatoria; devuelve su nombre."""
+    nombre = f"Licenciatura {int(rng.integers(NOMBRES_POSIBLES)):02d}"
+    eleccion = rng.random()
+    if eleccion < 0.45:
+        registro.guardar(nombre, fila_aleatoria(rng))
+        return "guardar"
+    if eleccion < 0.55 and nombre in registro:
+        fila = registro.como_dataframe().set_index("Licenciatura").loc[nombre, list(COLUMNAS_REGISTRO)].to_dict()
+        registro.guardar(nombre, fila)
+        return "guardar sin cambios"
+    if eleccion < 0.70:
+        nombres = [f"Licenciatura {i:02d}" for i in rng.integers(NOMBRES_POSIBLES, size=int(rng.integers(1, 8)))]
+        registro.guardar_tabla(pd.DataFrame([{"Licenciatura": n, **fila_aleatoria(rng)} for n in nombres]))
+        return "guardar_tabla"
+    if eleccion < 0.97 and len(registro):
+        registro.eliminar(registro.como_dataframe()["Licenciatura"].iloc[int(rng.integers(len(registro)))])
+        return "eliminar"
+    if eleccion >= 0.97:
+        registro.vaciar()
+        return "vaciar"
+    return "nada"
+
+
+def _ordenada(df):
+    # Los bloques conservan las filas de cada licenciatura pero no el orden
+    # entre licenciaturas del registro (las bajas se aplican al sincronizar).
+    clave = df["Licenciatura"].astype(str)
+    return df.iloc[np.argsort(clave.to_numpy(), kind="stable")].reset_index(drop=True)
+
+
+def comparar(registro, simulacion, proyeccion, valores):
+    """Lista de diferencias entre los bloques y el recálculo completo."""
+    df = registro.como_dataframe()
+    errores = []
+    if sorted(simulacion.nombres) != sorted(df["Licenciatura"]) or sorted(proyeccion.nombres) != sorted(df["Licenciatura"]):
+        errores.append("nombres distintos")
+        return errores
+
+    esperada = simular_cartera(df, valores)
+    try:
+        pd.testing.assert_frame_equal(_ordenada(simulacion.como_dataframe()), _ordenada(esperada), check_categorical=False)
+    except AssertionError as error:
+        errores.append(f"simulación: {error}")
+    utilidad = esperada.groupby("Cambio (%)", sort=False)["Utilidad Neta"].sum().reindex(valores).fillna(0.0).to_numpy()
+    if not np.allclose(simulacion.utilidad_por_cambio, utilidad, rtol=1e-9, atol=1e-3):
+        errores.append("utilidad_por_cambio")
+
+    esperada = proyectar_cartera(df, HORIZONTE, TASA_MATRICULA, TASA_COSTOS)
+    try:
+        pd.testing.assert_frame_equal(_ordenada(proyeccion.como_dataframe()), _ordenada(esperada), check_categorical=False)
+    except AssertionError as error:
+        errores.append(f"proyección: {error}")
+    resumen, resumen_esperado = proyeccion.resumen(), resumen_proyeccion_cartera(esperada)
+    for clave, valor in resumen_esperado.items():
+        if not np.isclose(resumen[clave], valor, rtol=1e-9, atol=1e-3):
+            errores.append(f"resumen {clave}: {resumen[clave]} != {valor}")
+    return errores
+
+
+def verificar(operaciones=300, semilla=0, max_entre_sincronizaciones=5, informar=print):
+    """Corre la secuencia aleatoria; devuelve el número de sincronizaciones con diferencias."""
+    rng = np.random.default_rng(semilla)
+    valores = valores_variacion(50)
+    registro = RegistroLicenciaturas(capacidad=2)
+    simulacion = SimulacionIncremental(valores, capacidad=2)
+    proyeccion = ProyeccionIncremental(HORIZONTE, TASA_MATRICULA, TASA_COSTOS, capacidad=2)
+
+    fallas = hechas = sincronizaciones = 0
+    while hechas < operaciones:
+        pendientes = [operar(registro, rng) for _ in range(int(rng.integers(0, max_entre_sincronizaciones + 1)))]
+        hechas += len(pendientes)
+        simulacion.sincronizar(registro)
+        proyeccion.sincronizar(registro)
+        sincronizaciones += 1
+        errores = comparar(registro, simulacion, proyeccion, valores)
+        if errores:
+            fallas += 1
+            informar(f"Sincronización {sincronizaciones} tras {pendientes}:")
+            for error in errores:
+                informar(f"  {error}")
+    informar(f"{hechas} operaciones, {sincronizaciones} sincronizaciones, {fallas} con diferencias.")
+    return fallas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.incremental", description=__doc__.splitlines()[0])
+    parser.add_argument("--operaciones", type=int, default=300)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--max-entre-sincronizaciones", type=int, default=5, help="Operaciones máximas entre dos sincronizaciones.")
+    args = parser.parse_args(argv)
+    return 1 if verificar(args.operaciones, args.semilla, args.max_entre_sincronizaciones) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""Tiempos y memoria pico de las rutas de cálculo con catálogos sintéticos.
+
+Uso::
+
+    python -m benchmarks.medir --salida benchmarks/linea_base.json
+    python -m benchmarks.medir --comparar benchmarks/linea_base.json
+
+Cada caso se mide con el motor vectorizado y, hasta ``--max-referencia``
+licenciaturas, con los ciclos originales de ``benchmarks.referencia``; en
+ese caso también se comprueba que ambos den los mismos números.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import referencia
+from equilibrio.exportar import libro_cartera, libro_excel
+from equilibrio.motor import (
+    calcular_cartera,
+    curva_equilibrio,
+    proyectar,
+    proyectar_cartera,
+    simular_cartera,
+    valores_variacion,
+)
+
+
+TAMANOS = (10, 1_000, 100_000)
+HORIZONTES = (12, 120)
+CAPACIDADES_CURVA = (1_000, 100_000)
+TASA_MATRICULA = 0.5
+TASA_COSTOS = 2.0
+# Diferencia relativa máxima aceptada frente a los ciclos originales; la
+# proyección en forma cerrada difiere solo por redondeo.
+TOLERANCIA = 1e-9
+UMBRAL_REGRESION = 1.5
+# Por debajo de este tiempo el ruido domina y no se reportan regresiones.
+SEGUNDOS_MINIMOS = 0.01
+
+
+def catalogo(programas, semilla=0):
+    """Cartera sintética con capacidades de hasta 100 000 lugares."""
+    rng = np.random.default_rng(semilla)
+    aulas = rng.integers(1, 201, programas)
+    capacidad_aula = rng.integers(5, 501, programas)
+    capacidad = aulas * capacidad_aula
+    estudiantes = (capacidad * rng.uniform(0, 1, programas)).astype(np.int64)
+    df = calcular_cartera(
+        [f"Licenciatura {i:06d}" for i in range(programas)],
+        aulas,
+        capacidad_aula,
+        estudiantes,
+        np.round(capacidad * rng.uniform(200, 2_000, programas), 2),
+        np.round(capacidad * rng.uniform(50, 800, programas), 2),
+        np.ones(programas, dtype=bool),
+        rng.uniform(5, 40, programas),
+        np.zeros(programas),
+    )
+    return df[df["Viable"]].reset_index(drop=True)
+
+
+def diferencia(obtenido, esperado):
+    """Máxima diferencia relativa entre dos DataFrames; ``inf`` si no cuadran."""
+    if list(obtenido.columns) != list(esperado.columns) or len(obtenido) != len(esperado):
+        return float("inf")
+    maxima = 0.0
+    for columna in esperado.columns:
+        a, b = obtenido[columna], esperado[columna]
+        if pd.api.types.is_numeric_dtype(b) and pd.api.types.is_numeric_dtype(a):
+            a, b = a.to_numpy(dtype=np.float64), b.to_numpy(dtype=np.float64)
+            escala = np.maximum(np.abs(b), 1.0)
+            maxima = max(maxima, float(np.max(np.abs(a - b) / escala, initial=0.0)))
+        elif not np.array_equal(a.astype(str).to_numpy(), b.astype(str).to_numpy()):
+            return float("inf")
+    return maxima
+
+
+def medir(funcion, repeticiones):
+    """Mejor tiempo de ``repeticiones`` llamadas y memoria pico de una más."""
+    tiempos = []
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+        del resultado
+    gc.collect()
+    tracemalloc.start()
+    resultado = funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(tiempos), pico / 2**20, resultado
+
+
+def casos(tamanos, horizontes, capacidades, max_referencia, max_exportacion):
+    """Genera ``(caso, parametros, vectorizado, referencia)`` para cada medición."""
+    valores = valores_variacion(100)
+    for capacidad in capacidades:
+        argumentos = (2_500.0, 300.0, 1_000_000.0, capacidad)
+        yield "curva_equilibrio", {"capacidad": capacidad}, lambda a=argumentos: curva_equilibrio(*a), lambda a=argumentos: referencia.curva_equilibrio(*a)
+
+    for programas in tamanos:
+        df = catalogo(programas)
+        con_referencia = programas <= max_referencia
+        parametros = {"programas": programas}
+
+        yield (
+            "simulacion_todas", parametros,
+            lambda df=df: simular_cartera(df, valores),
+            (lambda df=df: referencia.simular_cartera(df, valores)) if con_referencia else None,
+        )
+        for horizonte in horizontes:
+            tasas = (horizonte, TASA_MATRICULA, TASA_COSTOS)
+            yield (
+                "proyeccion_todas", {**parametros, "horizonte": horizonte},
+                lambda df=df, t=tasas: proyectar_cartera(df, *t),
+                (lambda df=df, t=tasas: referencia.proyectar_cartera(df, *t)) if con_referencia else None,
+            )
+
+        if programas <= max_exportacion:
+            yield (
+                "excel_simulacion", parametros,
+                lambda df=df: libro_excel({"Simulación": simular_cartera(df, valores)}),
+                (lambda df=df: referencia.libro_excel({"Simulación": referencia.simular_cartera(df, valores)})) if con_referencia else None,
+            )
+            yield (
+                "excel_cartera", {**parametros, "horizonte": 12},
+                lambda df=df: libro_cartera(df, valores, 12, TASA_MATRICULA, TASA_COSTOS),
+                None,
+            )
+
+    fila = catalogo(1).iloc[0]
+    entradas = (fila["Estudiantes"], fila["Colegiatura"], fila["Costo Fijo"], fila["Costo Variable"])
+    for horizonte in horizontes:
+        tasas = (horizonte, TASA_MATRICULA, TASA_COSTOS)
+        yield (
+            "proyeccion_una", {"horizonte": horizonte},
+            lambda t=tasas: proyectar(*entradas, *t),
+            lambda t=tasas: referencia.proyectar(*entradas, *t),
+        )
+
+
+def ejecutar(tamanos=TAMANOS, horizontes=HORIZONTES, capacidades=CAPACIDADES_CURVA, repeticiones=3,
+             max_referencia=1_000, max_exportacion=1_000, salida=None, informar=print):
+    resultados = []
+    for caso, parametros, vectorizado, original in casos(tamanos, horizontes, capacidades, max_referencia, max_exportacion):
+        segundos, memoria, obtenido = medir(vectorizado, repeticiones)
+        registro = {"caso": caso, **parametros, "segundos": segundos, "memoria_pico_mb": memoria}
+        if original is not None:
+            segundos_ref, memoria_ref, esperado = medir(original, 1)
+            registro.update({"referencia_segundos": segundos_ref, "referencia_memoria_pico_mb": memoria_ref})
+            if isinstance(esperado, pd.DataFrame):
+                dif = diferencia(obtenido, esperado)
+                registro.update({"diferencia_relativa": dif, "igual_a_referencia": dif <= TOLERANCIA})
+        resultados.append(registro)
+        informar(_linea(registro))
+        del obtenido
+
+    linea_base = {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "entorno": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "plataforma": platform.platform(),
+            "procesador": platform.processor() or platform.machine(),
+        },
+        "resultados": resultados,
+    }
+    if salida:
+        with open(salida, "w", encoding="utf-8") as archivo:
+            json.dump(linea_base, archivo, ensure_ascii=False, indent=2)
+    return linea_base
+
+
+def _clave(registro):
+    return tuple((k, v) for k, v in registro.items() if k in ("caso", "programas", "horizonte", "capacidad"))
+
+
+def _linea(registro):
+    parametros = ", ".join(f"{k}={v}" for k, v in _clave(registro)[1:])
+    texto = f"{registro['caso']:<18} {parametros:<30} {registro['segundos']:>9.4f} s {registro['memoria_pico_mb']:>9.1f} MB"
+    if "referencia_segundos" in registro:
+        texto += f" | ciclos {registro['referencia_segundos']:>9.4f} s"
+    if "igual_a_referencia" in registro:
+        texto += " | igual" if registro["igual_a_referencia"] else f" | DIFERENTE ({registro['diferencia_relativa']:.2e})"
+    return texto
+
+
+def comparar(actual, base, umbral=UMBRAL_REGRESION):
+    """Casos más lentos o con más memoria que ``umbral`` veces la línea base."""
+    anteriores = {_clave(r): r for r in base["resultados"]}
+    regresiones = []
+    for registro in actual["resultados"]:
+        anterior = anteriores.get(_clave(registro))
+        if anterior is None:
+            continue
+        if registro["segundos"] > SEGUNDOS_MINIMOS and registro["segundos"] > umbral * anterior["segundos"]:
+            regresiones.append((registro, "segundos", anterior["segundos"]))
+        if registro["memoria_pico_mb"] > umbral * max(anterior["memoria_pico_mb"], 1.0):
+            regresiones.append((registro, "memoria_pico_mb", anterior["memoria_pico_mb"]))
+    return regresiones
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.medir", description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", type=int, nargs="+", default=list(TAMANOS), help="Licenciaturas por catálogo.")
+    parser.add_argument("--horizontes", type=int, nargs="+", default=list(HORIZONTES), help="Meses de proyección.")
+    parser.add_argument("--capacidades", type=int, nargs="+", default=list(CAPACIDADES_CURVA), help="Capacidades de la curva de equilibrio.")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--max-referencia", type=int, default=1_000, help="Catálogo más grande que se compara con los ciclos originales.")
+    parser.add_argument("--max-exportacion", type=int, default=1_000, help="Catálogo más grande que se exporta a Excel.")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados.")
+    parser.add_argument("--comparar", help="Línea base JSON contra la cual buscar regresiones.")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION, help="Proporción sobre la línea base que cuenta como regresión.")
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            base = json.load(archivo)
+
+    actual = ejecutar(
+        tamanos=args.tamanos, horizontes=args.horizontes, capacidades=args.capacidades,
+        repeticiones=args.repeticiones, max_referencia=args.max_referencia,
+        max_exportacion=args.max_exportacion, salida=args.salida,
+    )
+
+    codigo = 0
+    if any(r.get("igual_a_referencia") is False for r in actual["resultados"]):
+        print("Error: el motor vectorizado no coincide con los ciclos originales.", file=sys.stderr)
+        codigo = 1
+    if base is not None:
+        regresiones = comparar(actual, base, args.umbral)
+        for registro, metrica, anterior in regresiones:
+            print(f"Regresión en {registro['caso']} {dict(_clave(registro)[1:])}: {metrica} {anterior:.4f} → {registro[metrica]:.4f}", file=sys.stderr)
+        if regresiones:
+            codigo = 1
+        else:
+            print(f"Sin regresiones frente a {args.comparar}.")
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Cálculos con los ciclos originales del dashboard, como referencia.
+
+Son copias literales de la lógica previa a la vectorización (fila por fila
+con ``iterrows`` y listas de diccionarios); solo sirven para comprobar que
+el motor vectorizado da los mismos números y para medir la diferencia.
+"""
+from io import BytesIO
+
+import pandas as pd
+
+
+def curva_equilibrio(colegiatura, costo_variable_estudiante, costo_fijo_total, capacidad_total):
+    return pd.DataFrame({
+        "Alumnos": list(range(1, int(capacidad_total) + 1)),
+        "Ingresos": [i * colegiatura for i in range(1, int(capacidad_total) + 1)],
+        "Egresos": [costo_fijo_total + (i * costo_variable_estudiante) for i in range(1, int(capacidad_total) + 1)],
+    })
+
+
+def simular_cartera(df, valores):
+    resultados = []
+    for _, fila in df.iterrows():
+        nombre = fila["Licenciatura"]
+        estudiantes_iniciales = fila["Estudiantes"]
+        colegiatura = fila["Colegiatura"]
+        costo_fijo = fila["Costo Fijo"]
+        costo_variable = fila["Costo Variable"]
+        costo_variable_unitario = costo_variable / estudiantes_iniciales if estudiantes_iniciales > 0 else 0
+
+        for v in valores:
+            cambio_pct = v
+            estudiantes_simulados = max(0, int(estudiantes_iniciales * (1 + cambio_pct / 100)))
+            ingresos = estudiantes_simulados * colegiatura
+            egresos = costo_fijo + (estudiantes_simulados * costo_variable_unitario)
+            utilidad = ingresos - egresos
+            rentabilidad = "Rentable" if utilidad >= 0 else "No Rentable"
+
+            resultados.append({
+                "Licenciatura": nombre,
+                "Cambio (%)": cambio_pct,
+                "Estudiantes": estudiantes_simulados,
+                "Ingresos": ingresos,
+                "Egresos": egresos,
+                "Utilidad Neta": utilidad,
+                "Rentabilidad": rentabilidad
+            })
+
+    return pd.DataFrame(resultados)
+
+
+def proyectar_cartera(df, horizonte, tasa_matricula, tasa_costos):
+    rango_meses = list(range(1, horizonte + 1))
+    resultados = []
+
+    for _, fila in df.iterrows():
+        nombre = fila["Licenciatura"]
+        est = fila["Estudiantes"]
+        colegiatura = fila["Colegiatura"]
+        c_fijo = fila["Costo Fijo"]
+        c_var_unit = fila["Costo Variable"] / est if est > 0 else 0
+
+        for mes in rango_meses:
+            est *= (1 + tasa_matricula / 100)
+            c_fijo *= (1 + tasa_costos / 100)
+            c_var_unit *= (1 + tasa_costos / 100)
+
+            ingresos = est * colegiatura
+            c_var_total = est * c_var_unit
+            egresos = c_fijo + c_var_total
+            utilidad = ingresos - egresos
+
+            resultados.append({
+                "Licenciatura": nombre,
+                "Mes": f"Mes {mes}",
+                "Estudiantes": est,
+                "Ingresos": ingresos,
+                "Costos Fijos": c_fijo,
+                "Costos Variables": c_var_total,
+                "Egresos Totales": egresos,
+                "Utilidad Neta": utilidad
+            })
+
+    return pd.DataFrame(resultados)
+
+
+def proyectar(estudiantes_iniciales, colegiatura, costo_fijo, costo_variable_total, horizonte, tasa_matricula, tasa_costos):
+    capacidad_total = estudiantes_iniciales if estudiantes_iniciales > 0 else 1
+    costo_variable_unitario = costo_variable_total / capacidad_total
+
+    meses = list(range(1, horizonte + 1))
+    estudiantes_mes, ingresos_mes, costos_fijos_mes, costos_variables_mes, egresos_mes, utilidad_mes = [], [], [], [], [], []
+
+    est = estudiantes_iniciales
+    c_fijo = costo_fijo
+    c_var = costo_variable_unitario
+
+    for mes in meses:
+        est *= (1 + tasa_matricula / 100)
+        c_fijo *= (1 + tasa_costos / 100)
+        c_var *= (1 + tasa_costos / 100)
+
+        ingresos = est * colegiatura
+        c_var_total = est * c_var
+        egresos = c_fijo + c_var_total
+        utilidad = ingresos - egresos
+
+        estudiantes_mes.append(est)
+        ingresos_mes.append(ingresos)
+        costos_fijos_mes.append(c_fijo)
+        costos_variables_mes.append(c_var_total)
+        egresos_mes.append(egresos)
+        utilidad_mes.append(utilidad)
+
+    return pd.DataFrame({
+        "Mes": [f"Mes {m}" for m in meses],
+        "Estudiantes": estudiantes_mes,
+        "Ingresos": ingresos_mes,
+        "Costos Fijos": costos_fijos_mes,
+        "Costos Variables": costos_variables_mes,
+        "Egresos Totales": egresos_mes,
+        "Utilidad Neta": utilidad_mes
+    })
+
+
+def libro_excel(hojas):
+    """Libro escrito con ``to_excel`` de pandas, como el botón original."""
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+        for nombre, df in hojas.items():
+            df.to_excel(writer, sheet_name=nombre, index=False)
+    return output.getvalue()
+
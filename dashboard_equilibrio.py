@@ -1,23 +1,40 @@
+from collections import deque
+from uuid import uuid4
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-from io import BytesIO
-import plotly.express as px
+
+from equilibrio import (
+    ColegiaturaNoViable,
+    RegistroLicenciaturas,
+    analizar_licenciatura,
+    calcular_colegiatura,
+    colegiatura_cubre_variable,
+    curva_equilibrio,
+    etiquetas_meses,
+    extremos_equilibrio,
+    proyectar,
+    recalcular_colegiatura_para_rentabilidad,
+    resumen_proyeccion,
+    simular_escenarios,
+    valores_variacion,
+)
+from equilibrio.almacen import Almacen
+from equilibrio.cache import BYTES_SESION, LIMITE_SESION, CacheLRU, huella, memorizar
+from equilibrio.diagnostico import HISTORIAL_MAXIMO, RUTA_METRICAS, Perfil, exportar, linea_json, tabla_etapas, tamanos_sesion
+from equilibrio.exportar import MIME_EXCEL, libro_cartera, libro_excel
+from equilibrio.importar import EXTENSIONES_IMPORTACION, importar_licenciaturas, leer_archivo
+from equilibrio.incremental import ProyeccionIncremental, SimulacionIncremental
+from equilibrio.optimizacion import CRITERIOS_MARGEN, optimizar_colegiaturas
+from equilibrio.riesgo import PROCESOS_RIESGO, simular_riesgo, simular_riesgo_cartera
+from equilibrio.sensibilidad import rejilla, superficie_sensibilidad
+
+# Plotly se importa dentro de las funciones que arman gráficos: cargarlo
+# cuesta más que el resto del arranque y muchas ejecuciones no dibujan nada.
 
 st.set_page_config(page_title="Proyección Punto de Equilibrio", layout="wide")
 st.title("Punto de Equilibrio para Licenciatura")
 
-def calcular_colegiatura(num_aulas, capacidad_aula, estudiantes_actuales, costo_fijo, costo_variable, incluir_utilidad, utilidad_pct, colegiatura_manual):
-    capacidad_total = num_aulas * capacidad_aula
-    costo_variable_unitario = costo_variable / capacidad_total if capacidad_total > 0 else 0
-    if incluir_utilidad:
-        colegiatura = (costo_fijo + costo_variable) / capacidad_total
-        colegiatura = colegiatura / (1 - (utilidad_pct / 100))
-    else:
-        colegiatura = colegiatura_manual
-    return colegiatura, capacidad_total, costo_variable_unitario
-
 def verificar_punto_equilibrio(
     colegiatura_final,
     costo_variable_estudiante,
@@ -29,44 +46,310 @@ def verificar_punto_equilibrio(
     if colegiatura_final <= costo_variable_estudiante:
         st.error("❌ La colegiatura es menor o igual al costo variable por estudiante. No hay rentabilidad.")
         if st.checkbox("¿Deseas recalcular la colegiatura para cubrir al menos el costo variable?", key=f"{clave_base}_recalculo_costo_variable"):
-            diferencia = costo_variable_estudiante - colegiatura_final
-            colegiatura_final += diferencia + 1
+            colegiatura_final = colegiatura_cubre_variable(costo_variable_estudiante)
             st.info(f"📈 Nueva colegiatura sugerida: ${colegiatura_final:.2f}")
         else:
             st.stop()
 
-    punto_equilibrio = costo_fijo_total / (colegiatura_final - costo_variable_estudiante)
-    punto_equilibrio_redondo = int(np.ceil(punto_equilibrio))
+    resultado = analizar_licenciatura(colegiatura_final, costo_variable_estudiante, costo_fijo_total, capacidad_total, estudiantes_final)
+    punto_equilibrio_redondo = resultado.punto_equilibrio
 
-    if punto_equilibrio_redondo > capacidad_total:
+    if resultado.supera_capacidad:
         st.warning("⚠️ El punto de equilibrio es mayor a la capacidad máxima.")
-    if punto_equilibrio_redondo > estudiantes_final:
+    if resultado.supera_estudiantes:
         st.warning("⚠️ El punto de equilibrio es mayor al número de estudiantes actuales.")
         if st.checkbox("¿Deseas recalcular la colegiatura para mejorar la rentabilidad?", key=f"{clave_base}_recalculo_rentabilidad"):
-            colegiatura_final, punto_equilibrio_redondo = recalcular_colegiatura_para_rentabilidad(
-                costo_variable_estudiante, costo_fijo_total, estudiantes_final
-            )
+            try:
+                colegiatura_final, punto_equilibrio_redondo = recalcular_colegiatura_para_rentabilidad(
+                    costo_variable_estudiante, costo_fijo_total, estudiantes_final
+                )
+            except ColegiaturaNoViable as error:
+                st.error(f"❌ {error}")
+            else:
+                st.info(f"📈 Nueva colegiatura sugerida para rentabilidad mínima: ${colegiatura_final:.2f}")
+                st.markdown(f"🔁 Nuevo punto de equilibrio: **{punto_equilibrio_redondo} alumnos**")
 
     return colegiatura_final, punto_equilibrio_redondo
 
-def recalcular_colegiatura_para_rentabilidad(costo_variable_estudiante, costo_fijo_total, estudiantes_final):
-    nueva_colegiatura = costo_variable_estudiante + (costo_fijo_total / estudiantes_final)
-    nueva_colegiatura = np.ceil(nueva_colegiatura)
-    st.info(f"📈 Nueva colegiatura sugerida para rentabilidad mínima: ${nueva_colegiatura:.2f}")
-    nuevo_pe = int(np.ceil(costo_fijo_total / (nueva_colegiatura - costo_variable_estudiante)))
-    st.markdown(f"🔁 Nuevo punto de equilibrio: **{nuevo_pe} alumnos**")
-    return nueva_colegiatura, nuevo_pe
+@st.cache_resource
+def almacen_compartido():
+    return Almacen()
+
+def espacio_de_trabajo():
+    # El espacio viaja en la URL para que recargar la página no pierda los datos.
+    if "espacio" not in st.query_params:
+        st.query_params["espacio"] = uuid4().hex
+    return st.query_params["espacio"]
+
+def historial_perfiles():
+    if "historial_perfiles" not in st.session_state:
+        st.session_state.historial_perfiles = deque(maxlen=HISTORIAL_MAXIMO)
+    return st.session_state.historial_perfiles
+
+def iniciar_perfil(seccion):
+    if "id_sesion" not in st.session_state:
+        st.session_state.id_sesion = uuid4().hex
+    anterior = st.session_state.get("perfil")
+    if anterior is not None:
+        # Una ejecución cortada con st.stop no llegó a cerrar su perfil.
+        cerrar_perfil(anterior, terminado=False)
+    st.session_state.perfil = Perfil(st.session_state.id_sesion, seccion)
+
+def cerrar_perfil(perfil, terminado=True):
+    # Medir la sesión recorre todo su contenido: solo se hace si alguien
+    # va a ver o guardar el dato.
+    tamanos = None
+    if st.session_state.get("diagnostico_activo") or RUTA_METRICAS:
+        tamanos = tamanos_sesion(st.session_state)
+    if perfil.cerrar(sum(tamanos.values()) if tamanos else None, terminado):
+        historial_perfiles().append(perfil.como_dict())
+        exportar(perfil.como_dict())
+    return tamanos
+
+def medir_etapa(nombre, **datos):
+    return st.session_state.perfil.medir(nombre, **datos)
+
+def mostrar_tabla(df):
+    with medir_etapa("st.dataframe", filas=len(df)):
+        st.dataframe(df, width="stretch")
+
+def mostrar_grafico(fig):
+    with medir_etapa("st.plotly_chart", trazas=len(fig.data)):
+        st.plotly_chart(fig, width="stretch")
+
+def calculo_memorizado(etapa, funcion, *args):
+    # Las funciones que arman figuras se memorizan en la etapa "graficos",
+    # que no se guarda en disco; dentro, el cálculo del motor se memoriza
+    # en su propia etapa y es lo único que llega al almacén.
+    if "cache_calculos" not in st.session_state:
+        st.session_state.cache_calculos = CacheLRU(LIMITE_SESION, BYTES_SESION)
+    with medir_etapa(f"{etapa}.{funcion.__name__}"):
+        return memorizar(
+            etapa, funcion, *args, sesion=st.session_state.cache_calculos,
+            almacen=almacen_compartido(), espacio=espacio_de_trabajo()
+        )
+
+def descarga_medida(nombre, generar):
+    # El archivo se genera al hacer clic, fuera de la ejecución del script,
+    # así que su tiempo se registra en un perfil propio.
+    sesion, historial = st.session_state.id_sesion, historial_perfiles()
+
+    def generar_y_medir():
+        perfil = Perfil(sesion, "exportacion")
+        with perfil.medir(nombre) as registro:
+            datos = generar()
+            registro["bytes"] = len(datos)
+        perfil.cerrar()
+        historial.append(perfil.como_dict())
+        exportar(perfil.como_dict())
+        return datos
+
+    return generar_y_medir
+
+def boton_descarga_excel(etiqueta, hojas, file_name):
+    # El libro se genera solo al hacer clic y se reutiliza mientras el
+    # contenido de las hojas no cambie.
+    st.download_button(
+        etiqueta,
+        descarga_medida("exportacion.libro_excel", lambda: memorizar("exportacion", libro_excel, hojas())),
+        file_name=file_name,
+        mime=MIME_EXCEL,
+        on_click="ignore"
+    )
+
+def grafico_equilibrio(colegiatura_final, costo_variable_estudiante, costo_fijo_total, capacidad_total, punto_equilibrio_redondo, estudiantes_final):
+    import plotly.graph_objects as go
+    df_equilibrio = calculo_memorizado("equilibrio", extremos_equilibrio, colegiatura_final, costo_variable_estudiante, costo_fijo_total, capacidad_total)
+    ingreso_actual = estudiantes_final * colegiatura_final
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df_equilibrio["Alumnos"], y=df_equilibrio["Ingresos"], mode='lines', name='Ingresos', line=dict(color='green')))
+    fig.add_trace(go.Scatter(x=df_equilibrio["Alumnos"], y=df_equilibrio["Egresos"], mode='lines', name='Egresos', line=dict(color='red')))
+    fig.add_trace(go.Scatter(x=[punto_equilibrio_redondo], y=[punto_equilibrio_redondo * colegiatura_final], mode='markers+text', name="Punto de Equilibrio", text=["PE"], marker=dict(size=10, color='blue')))
+    fig.add_trace(go.Scatter(x=[estudiantes_final], y=[ingreso_actual], mode='markers+text', name="Ingreso Actual", text=["IA"], textposition="bottom center", marker=dict(size=10, color='orange')))
+
+    fig.update_layout(title="Gráfico de Rentabilidad", xaxis_title="Cantidad de Alumnos", yaxis_title="Monto ($)", legend=dict(orientation="h"))
+    return fig
+
+def cartera_incremental(etapa, clase, parametros, x, titulo, eje_x):
+    import plotly.graph_objects as go
+    # Un juego de bloques por etapa y sesión: si cambian los parámetros se
+    # empieza de nuevo; si no, solo se recalculan las licenciaturas editadas
+    # y se reemplazan sus líneas en el gráfico.
+    bloques_por_etapa = st.session_state.setdefault("bloques_cartera", {})
+    clave = huella(*parametros)
+    guardado = bloques_por_etapa.get(etapa)
+    if guardado is None or guardado[0] != clave:
+        guardado = (clave, clase(*parametros), {})
+        bloques_por_etapa[etapa] = guardado
+    _, bloques, grafico = guardado
+    with medir_etapa(f"{etapa}.sincronizar") as registro:
+        cambios = bloques.sincronizar(st.session_state.licenciaturas_pe)
+        registro["cambios"] = len(bloques) if cambios is None else sum(map(len, cambios))
+
+    def linea(nombre):
+        return go.Scatter(x=x, y=bloques.fila(nombre, "Utilidad Neta"), mode="lines+markers", name=nombre)
+
+    with medir_etapa(f"{etapa}.grafico", trazas=len(bloques)):
+        if cambios is None or "fig" not in grafico:
+            fig = go.Figure([linea(nombre) for nombre in bloques.nombres])
+            fig.update_layout(title=titulo, xaxis_title=eje_x, yaxis_title="Utilidad Neta", legend_title="Licenciatura")
+            grafico["fig"], grafico["trazas"] = fig, {traza.name: traza for traza in fig.data}
+        else:
+            fig, trazas = grafico["fig"], grafico["trazas"]
+            actualizados, eliminados = cambios
+            if eliminados:
+                eliminados = set(eliminados)
+                fig.data = [traza for traza in fig.data if traza.name not in eliminados]
+                grafico["trazas"] = trazas = {traza.name: traza for traza in fig.data}
+            for nombre in actualizados:
+                if nombre in trazas:
+                    trazas[nombre].y = bloques.fila(nombre, "Utilidad Neta")
+                else:
+                    fig.add_trace(linea(nombre))
+                    trazas[nombre] = fig.data[-1]
+    return bloques, grafico["fig"]
+
+def simulacion_con_grafico(estudiantes, colegiatura, costo_fijo, costo_variable, valores):
+    import plotly.graph_objects as go
+    df_simulacion = calculo_memorizado("simulacion", simular_escenarios, estudiantes, colegiatura, costo_fijo, costo_variable, valores)
+
+    with medir_etapa("simulacion.grafico"):
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=df_simulacion["Cambio (%)"], y=df_simulacion["Utilidad Neta"], name="Utilidad", marker_color="green"))
+        fig.add_trace(go.Scatter(x=df_simulacion["Cambio (%)"], y=df_simulacion["Ingresos"], mode="lines+markers", name="Ingresos", line=dict(color="blue")))
+        fig.add_trace(go.Scatter(x=df_simulacion["Cambio (%)"], y=df_simulacion["Egresos"], mode="lines+markers", name="Egresos", line=dict(color="red")))
+
+        fig.update_layout(title="Simulación de Ingresos vs Egresos", xaxis_title="Cambio en Estudiantes (%)", yaxis_title="Monto ($)")
+    return df_simulacion, fig
+
+CAMBIOS_COSTO_VARIABLE = list(range(-30, 40, 10))
+# Variación de matrícula (%) de la hoja de simulación del libro de cartera,
+# que se descarga desde Proyección; el botón la indica en su ayuda.
+RANGO_EXPORTACION = 100
+
+def superficie_para(estudiantes, colegiatura, costo_fijo, costo_variable, rango_colegiatura, rango_estudiantes, resolucion):
+    return superficie_sensibilidad(
+        estudiantes, colegiatura, costo_fijo, costo_variable,
+        rejilla(rango_colegiatura, resolucion), rejilla(rango_estudiantes, resolucion), CAMBIOS_COSTO_VARIABLE
+    )
+
+def grafico_sensibilidad(entradas, metrica, tipo, escala, cambio_costo_variable):
+    # La superficie se memoriza aparte: cambiar la escala, la métrica o el
+    # corte de costo variable solo reconstruye la figura.
+    superficie = calculo_memorizado("sensibilidad", superficie_para, *entradas)
+    corte = superficie.corte(cambio_costo_variable)
+    z = (superficie.utilidad if metrica == "Utilidad Neta" else superficie.margen)[corte]
+    x, y = superficie.cambios_estudiantes, superficie.cambios_colegiatura
+    with medir_etapa("sensibilidad.grafico", celdas=z.size):
+        return figura_sensibilidad(superficie, corte, z, x, y, metrica, tipo, escala, cambio_costo_variable)
+
+def figura_sensibilidad(superficie, corte, z, x, y, metrica, tipo, escala, cambio_costo_variable):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    if tipo == "Contorno":
+        fig.add_trace(go.Contour(x=x, y=y, z=z, colorscale=escala, name=metrica, colorbar=dict(title=metrica)))
+    else:
+        fig.add_trace(go.Heatmap(x=x, y=y, z=z, colorscale=escala, name=metrica, colorbar=dict(title=metrica)))
+    fig.add_trace(go.Contour(
+        x=x, y=y, z=superficie.utilidad[corte], contours=dict(start=0, end=0, coloring="lines"),
+        line=dict(color="black", width=2), showscale=False, name="Punto de Equilibrio", hoverinfo="skip"
+    ))
+    fig.add_trace(go.Scatter(x=[0], y=[0], mode="markers+text", text=["Actual"], textposition="top center", marker=dict(size=10, color="black"), name="Actual"))
+
+    fig.update_layout(
+        title=f"{metrica} según colegiatura y matrícula (costo variable {cambio_costo_variable:+d}%)",
+        xaxis_title="Cambio en Estudiantes (%)", yaxis_title="Cambio en Colegiatura (%)", legend=dict(orientation="h")
+    )
+    return fig
+
+def proyeccion_con_grafico(estudiantes, colegiatura, costo_fijo, costo_variable, horizonte, tasa_matricula, tasa_costos):
+    import plotly.graph_objects as go
+    df_proyeccion = calculo_memorizado("proyeccion", proyectar, estudiantes, colegiatura, costo_fijo, costo_variable, horizonte, tasa_matricula, tasa_costos)
+
+    with medir_etapa("proyeccion.grafico"):
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=df_proyeccion["Mes"], y=df_proyeccion["Ingresos"], mode="lines+markers", name="Ingresos", line=dict(color="green")))
+        fig.add_trace(go.Scatter(x=df_proyeccion["Mes"], y=df_proyeccion["Egresos Totales"], mode="lines+markers", name="Egresos", line=dict(color="red")))
+        fig.add_trace(go.Bar(x=df_proyeccion["Mes"], y=df_proyeccion["Utilidad Neta"], name="Utilidad", marker_color="blue", opacity=0.5))
+
+        fig.update_layout(title="📊 Proyección de Rentabilidad", xaxis_title="Mes", yaxis_title="Monto ($)", legend=dict(orientation="h"))
+    return df_proyeccion, resumen_proyeccion(df_proyeccion), fig
+
+def grafico_abanico(df_riesgo, titulo):
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df_riesgo["Mes"], y=df_riesgo["P95"], mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=df_riesgo["Mes"], y=df_riesgo["P5"], mode="lines", line=dict(width=0), fill="tonexty", fillcolor="rgba(0, 0, 255, 0.15)", name="P5 – P95"))
+    fig.add_trace(go.Scatter(x=df_riesgo["Mes"], y=df_riesgo["P75"], mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=df_riesgo["Mes"], y=df_riesgo["P25"], mode="lines", line=dict(width=0), fill="tonexty", fillcolor="rgba(0, 0, 255, 0.3)", name="P25 – P75"))
+    fig.add_trace(go.Scatter(x=df_riesgo["Mes"], y=df_riesgo["P50"], mode="lines+markers", name="Mediana", line=dict(color="blue")))
+    fig.add_trace(go.Scatter(x=df_riesgo["Mes"], y=df_riesgo["Prob. bajo equilibrio"], mode="lines", name="Prob. bajo equilibrio", line=dict(color="red", dash="dot"), yaxis="y2"))
+
+    fig.update_layout(
+        title=titulo, xaxis_title="Mes", yaxis_title="Utilidad Neta ($)", legend=dict(orientation="h"),
+        yaxis2=dict(title="Probabilidad", overlaying="y", side="right", range=[0, 1], tickformat=".0%")
+    )
+    return fig
+
+def riesgo_con_grafico(estudiantes, colegiatura, costo_fijo, costo_variable, horizonte, tasa_matricula, tasa_costos, vol_matricula, vol_costos, simulaciones):
+    resultado = calculo_memorizado(
+        "riesgo", simular_riesgo,
+        estudiantes, colegiatura, costo_fijo, costo_variable, horizonte, tasa_matricula, tasa_costos,
+        vol_matricula, vol_costos, simulaciones
+    )
+    df_riesgo = resultado.como_dataframe()
+    with medir_etapa("riesgo.grafico"):
+        return df_riesgo, resultado, grafico_abanico(df_riesgo, "🎲 Abanico de Utilidad Neta (Monte Carlo)")
+
+def riesgo_cartera_con_grafico(df, horizonte, tasa_matricula, tasa_costos, vol_matricula, vol_costos, simulaciones):
+    # Desde UMBRAL_PARALELO licenciaturas el Monte Carlo usa el pool de
+    # procesos compartido por todas las sesiones; con menos, simula en serie.
+    df_riesgo, df_resumen = calculo_memorizado(
+        "riesgo", simular_riesgo_cartera, df, horizonte, tasa_matricula, tasa_costos, vol_matricula, vol_costos, simulaciones,
+        0, PROCESOS_RIESGO
+    )
+    with medir_etapa("riesgo.grafico"):
+        fig = riesgo_cartera_grafico(df_riesgo)
+    return df_riesgo, df_resumen, fig
+
+def riesgo_cartera_grafico(df_riesgo):
+    import plotly.express as px
+    fig = px.line(
+        df_riesgo,
+        x="Mes",
+        y="Prob. bajo equilibrio",
+        color="Licenciatura",
+        title="🎲 Probabilidad de quedar bajo el punto de equilibrio",
+        markers=True
+    )
+    fig.update_layout(yaxis_tickformat=".0%")
+    return fig
+
+def optimizacion_con_grafico(df, horizonte, tasa_matricula, tasa_costos, margen_objetivo, tope_aumento, criterio):
+    import plotly.graph_objects as go
+    tabla, resumen = calculo_memorizado(
+        "optimizacion", optimizar_colegiaturas, df, horizonte, tasa_matricula, tasa_costos, margen_objetivo, tope_aumento, criterio
+    )
+    with medir_etapa("optimizacion.grafico"):
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=tabla["Licenciatura"], y=tabla["Aumento (%)"], name="Aumento (%)", marker_color=tabla["En Tope"].map({True: "red", False: "green"})))
+        fig.update_layout(title="🎯 Aumento de colegiatura propuesto", xaxis_title="Licenciatura", yaxis_title="Aumento (%)")
+    return tabla, resumen, fig
 
 if "licenciaturas_pe" not in st.session_state:
-    st.session_state.licenciaturas_pe = pd.DataFrame(columns=[
-        "Licenciatura", "Estudiantes", "Colegiatura", "Costo Fijo", "Costo Variable",
-        "PE Alumnos", "Ingresos Totales", "Egresos Totales", "Utilidad Neta"
-    ])
+    st.session_state.licenciaturas_pe = RegistroLicenciaturas()
+    st.session_state.licenciaturas_pe.guardar_tabla(almacen_compartido().licenciaturas(espacio_de_trabajo()))
 
 if "formulario_pe_calculado" not in st.session_state:
     st.session_state.formulario_pe_calculado = False
 
 seccion = st.sidebar.radio("Secciones", ["📊 Punto de Equilibrio", "🧪 Simulaciones", "📈 Proyección"])
+iniciar_perfil(seccion)
+diagnostico_activo = st.sidebar.toggle("🩺 Diagnóstico de rendimiento", key="diagnostico_activo")
+# El panel se llena al final, cuando ya se midieron todas las etapas.
+panel_diagnostico = st.sidebar.container()
 
 with st.sidebar.expander("🧹 Borrar historial de datos"):
     if st.button("🗑️ Borrar historial de licenciaturas, simulaciones y proyecciones"):
@@ -78,9 +361,11 @@ with st.sidebar.expander("🧹 Borrar historial de datos"):
             with col1:
                 if st.button("✅ Sí, borrar todo"):
 
-                    st.session_state.licenciaturas_pe = pd.DataFrame(columns=st.session_state.licenciaturas_pe.columns)
-                    if "nueva_licenciatura" in st.session_state:
-                        del st.session_state["nueva_licenciatura"]
+                    st.session_state.licenciaturas_pe.vaciar()
+                    almacen_compartido().vaciar_espacio(espacio_de_trabajo())
+                    if "cache_calculos" in st.session_state:
+                        st.session_state.cache_calculos.vaciar()
+                    st.session_state.pop("bloques_cartera", None)
 
                     for key in list(st.session_state.keys()):
                         if key.startswith("sim_") or key.startswith("proy_") or key in [
@@ -100,6 +385,30 @@ with st.sidebar.expander("🧹 Borrar historial de datos"):
 if seccion == "📊 Punto de Equilibrio":
     st.subheader("📝 Parámetros del Análisis")
 
+    with st.expander("📂 Importar licenciaturas desde archivo"):
+        archivo = st.file_uploader("Archivo CSV, Excel o Parquet", type=list(EXTENSIONES_IMPORTACION), key="archivo_licenciaturas")
+        st.caption("Columnas: Licenciatura, Aulas, Capacidad por Aula, Estudiantes, Costos, Gastos, Utilidad (%), Colegiatura Manual e Incluir Utilidad (opcional).")
+        if archivo is not None and st.button("📥 Cargar licenciaturas"):
+            try:
+                with medir_etapa("importacion.calculo") as registro:
+                    df_importado = importar_licenciaturas(leer_archivo(archivo))
+                    registro["filas"] = len(df_importado)
+            except ValueError as error:
+                st.error(f"❌ {error}")
+            else:
+                viables = df_importado[df_importado["Viable"]]
+                st.session_state.licenciaturas_pe.guardar_tabla(viables)
+                almacen_compartido().guardar_licenciaturas(espacio_de_trabajo(), viables)
+                # guardar_tabla une los nombres repetidos en una sola licenciatura.
+                st.success(f"✅ {viables['Licenciatura'].nunique()} licenciaturas cargadas.")
+
+                no_viables = df_importado[~df_importado["Viable"]]
+                if len(no_viables) > 0:
+                    st.warning(f"⚠️ {len(no_viables)} licenciaturas no son viables y no se cargaron.")
+                    mostrar_tabla(no_viables[["Licenciatura", "Colegiatura", "Costo Variable", "Capacidad", "Observación"]])
+
+                mostrar_tabla(st.session_state.licenciaturas_pe.como_dataframe())
+
     with st.form("formulario_pe"):
         nombre_licenciatura = st.text_input("Nombre de la licenciatura", value=st.session_state.get("nombre_licenciatura", "Nueva Licenciatura"), key="nombre_licenciatura")
         incluir_utilidad = st.checkbox("¿Incluir porcentaje de utilidad?", value=st.session_state.get("incluir_utilidad", False), key="incluir_utilidad")
@@ -115,6 +424,7 @@ if seccion == "📊 Punto de Equilibrio":
             utilidad = st.number_input(
                 "Porcentaje de utilidad (%)",
                 min_value=0.0,
+                max_value=99.99,
                 value=st.session_state.get("utilidad", 30.0),
                 format="%.2f",
                 disabled=not incluir_utilidad,
@@ -137,11 +447,15 @@ if seccion == "📊 Punto de Equilibrio":
         st.session_state.formulario_pe_calculado = True
 
     if st.session_state.get("formulario_pe_calculado", False):
-        colegiatura_final, capacidad_total, costo_variable_estudiante = calcular_colegiatura(
-            st.session_state.num_aulas, st.session_state.capacidad_aula, st.session_state.estudiantes_actuales,
-            st.session_state.costo_fijo_total, st.session_state.costo_variable,
-            st.session_state.incluir_utilidad, st.session_state.utilidad, st.session_state.colegiatura_manual
-        )
+        try:
+            colegiatura_final, capacidad_total, costo_variable_estudiante = calcular_colegiatura(
+                st.session_state.num_aulas, st.session_state.capacidad_aula, st.session_state.estudiantes_actuales,
+                st.session_state.costo_fijo_total, st.session_state.costo_variable,
+                st.session_state.incluir_utilidad, st.session_state.utilidad, st.session_state.colegiatura_manual
+            )
+        except ColegiaturaNoViable as error:
+            st.error(f"❌ {error}")
+            st.stop()
 
         if st.session_state.incluir_utilidad:
             estudiantes_final = capacidad_total
@@ -150,32 +464,25 @@ if seccion == "📊 Punto de Equilibrio":
             estudiantes_final = st.session_state.estudiantes_actuales
             ingreso_actual = estudiantes_final * colegiatura_final
 
-        colegiatura_final, punto_equilibrio_redondo = verificar_punto_equilibrio(
-            colegiatura_final,
-            costo_variable_estudiante,
-            st.session_state.costo_fijo_total,
-            capacidad_total,
-            estudiantes_final,
-            clave_base="formulario_pe"
-        )
+        with medir_etapa("equilibrio.calculo"):
+            colegiatura_final, punto_equilibrio_redondo = verificar_punto_equilibrio(
+                colegiatura_final,
+                costo_variable_estudiante,
+                st.session_state.costo_fijo_total,
+                capacidad_total,
+                estudiantes_final,
+                clave_base="formulario_pe"
+            )
 
         ingreso_actual = estudiantes_final * colegiatura_final
         egresos_actuales = st.session_state.costo_fijo_total + (estudiantes_final * costo_variable_estudiante)
 
-        df_equilibrio = pd.DataFrame({
-            "Alumnos": list(range(1, int(capacidad_total) + 1)),
-            "Ingresos": [i * colegiatura_final for i in range(1, int(capacidad_total) + 1)],
-            "Egresos": [st.session_state.costo_fijo_total + (i * costo_variable_estudiante) for i in range(1, int(capacidad_total) + 1)],
-        })
-
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=df_equilibrio["Alumnos"], y=df_equilibrio["Ingresos"], mode='lines', name='Ingresos', line=dict(color='green')))
-        fig.add_trace(go.Scatter(x=df_equilibrio["Alumnos"], y=df_equilibrio["Egresos"], mode='lines', name='Egresos', line=dict(color='red')))
-        fig.add_trace(go.Scatter(x=[punto_equilibrio_redondo], y=[punto_equilibrio_redondo * colegiatura_final], mode='markers+text', name="Punto de Equilibrio", text=["PE"], marker=dict(size=10, color='blue')))
-        fig.add_trace(go.Scatter(x=[estudiantes_final], y=[ingreso_actual], mode='markers+text', name="Ingreso Actual", text=["IA"], textposition="bottom center", marker=dict(size=10, color='orange')))
-
-        fig.update_layout(title="Gráfico de Rentabilidad", xaxis_title="Cantidad de Alumnos", yaxis_title="Monto ($)", legend=dict(orientation="h"))
-        st.plotly_chart(fig, use_container_width=True)
+        fig = calculo_memorizado(
+            "graficos", grafico_equilibrio,
+            colegiatura_final, costo_variable_estudiante, st.session_state.costo_fijo_total,
+            capacidad_total, punto_equilibrio_redondo, estudiantes_final
+        )
+        mostrar_grafico(fig)
 
         col1, col2, col3, col4 = st.columns(4)
         col1.metric("Punto de Equilibrio", f"{punto_equilibrio_redondo} alumnos")
@@ -185,9 +492,9 @@ if seccion == "📊 Punto de Equilibrio":
 
         st.success("Rentabilidad: RENTABLE" if ingreso_actual >= egresos_actuales else "Rentabilidad: NO RENTABLE")
 
-        nueva_licenciatura = pd.DataFrame([{
-            "Licenciatura": st.session_state.nombre_licenciatura,
+        fila_licenciatura = {
             "Estudiantes": estudiantes_final,
+            "Capacidad": capacidad_total,
             "Colegiatura": colegiatura_final,
             "Costo Fijo": st.session_state.costo_fijo_total,
             "Costo Variable": st.session_state.costo_variable,
@@ -195,277 +502,259 @@ if seccion == "📊 Punto de Equilibrio":
             "Ingresos Totales": ingreso_actual,
             "Egresos Totales": egresos_actuales,
             "Utilidad Neta": ingreso_actual - egresos_actuales
-        }])
+        }
+        if st.session_state.licenciaturas_pe.guardar(st.session_state.nombre_licenciatura, fila_licenciatura):
+            almacen_compartido().guardar_licenciatura(espacio_de_trabajo(), st.session_state.nombre_licenciatura, fila_licenciatura)
 
-        st.session_state.licenciaturas_pe = pd.concat([
-            st.session_state.get("licenciaturas_pe", pd.DataFrame()), nueva_licenciatura
-        ], ignore_index=True)
+        st.markdown("Licenciaturas analizadas")
+        mostrar_tabla(st.session_state.licenciaturas_pe.como_dataframe())
 
-        st.session_state.nueva_licenciatura = st.session_state.licenciaturas_pe.copy()
+        # El libro se arma al hacer clic, en un hilo sin acceso a
+        # st.session_state: la función solo usa variables locales.
+        costo_fijo_total = st.session_state.costo_fijo_total
 
-        st.markdown("Licenciaturas analizadas")
-        st.dataframe(st.session_state.licenciaturas_pe, use_container_width=True)
-
-        def generar_excel():
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-                df_equilibrio.to_excel(writer, sheet_name="Rentabilidad", index=False)
-                resumen = pd.DataFrame({
-                    "Concepto": ["Punto Equilibrio", "Estudiantes Actuales", "Capacidad Total", "Colegiatura", "Ingreso Actual", "Egresos Actuales", "Rentabilidad"],
-                    "Valor": [punto_equilibrio_redondo, estudiantes_final, capacidad_total, colegiatura_final, ingreso_actual, egresos_actuales, "Rentable" if ingreso_actual >= egresos_actuales else "No Rentable"]
-                })
-                resumen.to_excel(writer, sheet_name="Resumen", index=False)
-            return output.getvalue()
+        def hojas_analisis():
+            df_equilibrio = curva_equilibrio(colegiatura_final, costo_variable_estudiante, costo_fijo_total, capacidad_total)
+            resumen = pd.DataFrame({
+                "Concepto": ["Punto Equilibrio", "Estudiantes Actuales", "Capacidad Total", "Colegiatura", "Ingreso Actual", "Egresos Actuales", "Rentabilidad"],
+                "Valor": [punto_equilibrio_redondo, estudiantes_final, capacidad_total, colegiatura_final, ingreso_actual, egresos_actuales, "Rentable" if ingreso_actual >= egresos_actuales else "No Rentable"]
+            })
+            return {"Rentabilidad": df_equilibrio, "Resumen": resumen}
 
         if st.button("🔄 Realizar nuevo análisis"):
             st.session_state.formulario_pe_calculado = False
 
-        st.download_button("📥 Descargar Excel", generar_excel(), file_name=f"{st.session_state.nombre_licenciatura}_analisis.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        boton_descarga_excel("📥 Descargar Excel", hojas_analisis, f"{st.session_state.nombre_licenciatura}_analisis.xlsx")
 
 elif seccion == "🧪 Simulaciones":
     st.subheader("🔍 Simulación de Escenarios")
 
-    if "nueva_licenciatura" not in st.session_state:
+    if len(st.session_state.licenciaturas_pe) == 0:
         st.warning("Primero carga los datos de licenciaturas.")
     else:
-        df = st.session_state.nueva_licenciatura
+        df = st.session_state.licenciaturas_pe.como_dataframe()
         opciones = ["Todas"] + sorted(df["Licenciatura"].unique())
         seleccion = st.selectbox("Selecciona una licenciatura", opciones)
 
         if seleccion == "Todas":
-            rango = st.slider("Rango de variación de estudiantes (%)", min_value=-100, max_value=300, value=100, step=10)
-            valores = list(range(-rango, rango + 10, 10))
-
-            resultados = []
-            for _, fila in df.iterrows():
-                nombre = fila["Licenciatura"]
-                estudiantes_iniciales = fila["Estudiantes"]
-                colegiatura = fila["Colegiatura"]
-                costo_fijo = fila["Costo Fijo"]
-                costo_variable = fila["Costo Variable"]
-                costo_variable_unitario = costo_variable / estudiantes_iniciales if estudiantes_iniciales > 0 else 0
-
-                for v in valores:
-                    cambio_pct = v
-                    estudiantes_simulados = max(0, int(estudiantes_iniciales * (1 + cambio_pct / 100)))
-                    ingresos = estudiantes_simulados * colegiatura
-                    egresos = costo_fijo + (estudiantes_simulados * costo_variable_unitario)
-                    utilidad = ingresos - egresos
-                    rentabilidad = "Rentable" if utilidad >= 0 else "No Rentable"
-
-                    resultados.append({
-                        "Licenciatura": nombre,
-                        "Cambio (%)": cambio_pct,
-                        "Estudiantes": estudiantes_simulados,
-                        "Ingresos": ingresos,
-                        "Egresos": egresos,
-                        "Utilidad Neta": utilidad,
-                        "Rentabilidad": rentabilidad
-                    })
-
-            df_simulacion = pd.DataFrame(resultados)
-
-            st.dataframe(df_simulacion, use_container_width=True)
-
-            fig = px.line(
-                df_simulacion,
-                x="Cambio (%)",
-                y="Utilidad Neta",
-                color="Licenciatura",
-                markers=True,
-                title="Utilidad Neta por Licenciatura según Variación de Estudiantes"
+            rango = st.slider("Rango de variación de estudiantes (%)", min_value=-100, max_value=300, value=100, step=10, key="slider_todas")
+            valores = valores_variacion(rango)
+
+            bloques, fig = cartera_incremental(
+                "simulacion", SimulacionIncremental, (valores,), valores,
+                "Utilidad Neta por Licenciatura según Variación de Estudiantes", "Cambio (%)"
             )
-            st.plotly_chart(fig, use_container_width=True)
+            with medir_etapa("simulacion.tabla", filas=len(bloques) * len(valores)):
+                df_simulacion = bloques.como_dataframe()
+
+            mostrar_tabla(df_simulacion)
+            mostrar_grafico(fig)
         else:
             fila = df[df["Licenciatura"] == seleccion].iloc[0]
-            estudiantes_iniciales = fila["Estudiantes"]
-            colegiatura = fila["Colegiatura"]
-            costo_fijo = fila["Costo Fijo"]
-            costo_variable = fila["Costo Variable"]
-
-        capacidad_total = estudiantes_iniciales if estudiantes_iniciales > 0 else 1
-        costo_variable_unitario = costo_variable / capacidad_total
 
-        if seleccion == "Todas":
-            rango = st.slider("Rango de variación de estudiantes (%)", min_value=-100, max_value=300, value=100, step=10, key="slider_todas")
-            ...
-        else:
             rango = st.slider("Rango de variación de estudiantes (%)", min_value=-100, max_value=300, value=100, step=10, key="slider_una")
-            ...
-        valores = list(range(-rango, rango + 10, 10))
+            valores = valores_variacion(rango)
 
-        df_simulacion = pd.DataFrame({
-            "Cambio (%)": valores,
-            "Estudiantes": [max(0, int(estudiantes_iniciales * (1 + i / 100))) for i in valores],
-        })
+            df_simulacion, fig = calculo_memorizado(
+                "graficos", simulacion_con_grafico,
+                fila["Estudiantes"], fila["Colegiatura"], fila["Costo Fijo"], fila["Costo Variable"], valores
+            )
 
-        df_simulacion["Ingresos"] = df_simulacion["Estudiantes"] * colegiatura
-        df_simulacion["Egresos"] = costo_fijo + (df_simulacion["Estudiantes"] * costo_variable_unitario)
-        df_simulacion["Utilidad Neta"] = df_simulacion["Ingresos"] - df_simulacion["Egresos"]
-        df_simulacion["Rentabilidad"] = np.where(df_simulacion["Utilidad Neta"] >= 0, "Rentable", "No Rentable")
+            mostrar_tabla(df_simulacion)
+            mostrar_grafico(fig)
 
-        st.dataframe(df_simulacion, use_container_width=True)
+        boton_descarga_excel("📥 Descargar Simulación", lambda: {"Simulación": df_simulacion}, "simulacion_estudiantes.xlsx")
 
-        fig = go.Figure()
-        fig.add_trace(go.Bar(x=df_simulacion["Cambio (%)"], y=df_simulacion["Utilidad Neta"], name="Utilidad", marker_color="green"))
-        fig.add_trace(go.Scatter(x=df_simulacion["Cambio (%)"], y=df_simulacion["Ingresos"], mode="lines+markers", name="Ingresos", line=dict(color="blue")))
-        fig.add_trace(go.Scatter(x=df_simulacion["Cambio (%)"], y=df_simulacion["Egresos"], mode="lines+markers", name="Egresos", line=dict(color="red")))
+        if st.toggle("🗺️ Sensibilidad colegiatura × matrícula", key="sim_sensibilidad"):
+            if seleccion == "Todas":
+                datos = df
+            else:
+                datos = df[df["Licenciatura"] == seleccion]
 
-        fig.update_layout(title="Simulación de Ingresos vs Egresos", xaxis_title="Cambio en Estudiantes (%)", yaxis_title="Monto ($)")
-        st.plotly_chart(fig, use_container_width=True)
+            col1, col2, col3 = st.columns(3)
+            rango_colegiatura = col1.slider("Rango de colegiatura (%)", min_value=10, max_value=100, value=50, step=10, key="sim_rango_colegiatura")
+            rango_estudiantes = col2.slider("Rango de estudiantes (%)", min_value=10, max_value=300, value=100, step=10, key="sim_rango_estudiantes")
+            resolucion = col3.select_slider("Resolución", options=[50, 100, 200, 300, 500], value=200, key="sim_resolucion")
 
-        def exportar_simulacion():
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-                df_simulacion.to_excel(writer, sheet_name="Simulación", index=False)
-            return output.getvalue()
+            col4, col5, col6, col7 = st.columns(4)
+            metrica = col4.radio("Métrica", ["Utilidad Neta", "Margen de seguridad"], key="sim_metrica")
+            tipo = col5.radio("Gráfico", ["Mapa de calor", "Contorno"], key="sim_tipo_grafico")
+            escala = col6.selectbox("Escala de color", ["RdYlGn", "Viridis", "Cividis", "RdBu"], key="sim_escala")
+            cambio_costo_variable = col7.select_slider("Cambio en costo variable (%)", options=CAMBIOS_COSTO_VARIABLE, value=0, key="sim_cambio_costo_variable")
 
-        st.download_button("📥 Descargar Simulación", exportar_simulacion(), file_name="simulacion_estudiantes.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            entradas = (
+                datos["Estudiantes"].to_numpy(), datos["Colegiatura"].to_numpy(),
+                datos["Costo Fijo"].to_numpy(), datos["Costo Variable"].to_numpy(),
+                rango_colegiatura, rango_estudiantes, resolucion
+            )
+            fig = calculo_memorizado("graficos", grafico_sensibilidad, entradas, metrica, tipo, escala, cambio_costo_variable)
+            mostrar_grafico(fig)
 
 elif seccion == "📈 Proyección":
     st.subheader("📈 Proyección de Rentabilidad")
 
-    if "nueva_licenciatura" not in st.session_state:
+    if len(st.session_state.licenciaturas_pe) == 0:
         st.warning("Primero carga los datos de licenciaturas.")
     else:
-        df = st.session_state.nueva_licenciatura
+        df = st.session_state.licenciaturas_pe.como_dataframe()
         opciones = ["Todas"] + sorted(df["Licenciatura"].unique())
         seleccion = st.selectbox("Selecciona una licenciatura", opciones)
 
         col1, col2, col3 = st.columns(3)
-        horizonte = col1.selectbox("Horizonte de meses", [6, 12, 24], index=1)
+        horizonte = col1.selectbox("Horizonte de meses", [6, 12, 24, 36, 60, 120], index=1)
         tasa_matricula = col2.number_input("Crecimiento mensual de matrícula (%)", value=0.0, step=0.5)
         tasa_costos = col3.number_input("Inflación mensual de costos (%)", value=2.0, step=0.5)
 
+        analisis_riesgo = st.toggle("🎲 Análisis de riesgo (Monte Carlo)", key="proy_riesgo")
+        if analisis_riesgo:
+            col4, col5, col6 = st.columns(3)
+            vol_matricula = col4.number_input("Volatilidad mensual de matrícula (pp)", min_value=0.0, value=2.0, step=0.5, key="proy_vol_matricula")
+            vol_costos = col5.number_input("Volatilidad mensual de costos (pp)", min_value=0.0, value=1.0, step=0.5, key="proy_vol_costos")
+            simulaciones = col6.select_slider("Simulaciones", options=[1_000, 5_000, 10_000, 20_000, 50_000], value=10_000, key="proy_simulaciones")
+
         if seleccion == "Todas":
-            rango_meses = list(range(1, horizonte + 1))
-            resultados = []
-
-            for _, fila in df.iterrows():
-                nombre = fila["Licenciatura"]
-                est = fila["Estudiantes"]
-                colegiatura = fila["Colegiatura"]
-                c_fijo = fila["Costo Fijo"]
-                c_var_unit = fila["Costo Variable"] / est if est > 0 else 0
-
-                for mes in rango_meses:
-                    est *= (1 + tasa_matricula / 100)
-                    c_fijo *= (1 + tasa_costos / 100)
-                    c_var_unit *= (1 + tasa_costos / 100)
-
-                    ingresos = est * colegiatura
-                    c_var_total = est * c_var_unit
-                    egresos = c_fijo + c_var_total
-                    utilidad = ingresos - egresos
-
-                    resultados.append({
-                        "Licenciatura": nombre,
-                        "Mes": f"Mes {mes}",
-                        "Estudiantes": est,
-                        "Ingresos": ingresos,
-                        "Costos Fijos": c_fijo,
-                        "Costos Variables": c_var_total,
-                        "Egresos Totales": egresos,
-                        "Utilidad Neta": utilidad
-                    })
-
-            df_proyeccion = pd.DataFrame(resultados)
-
-            st.dataframe(df_proyeccion, use_container_width=True)
-
-            fig = px.line(
-                df_proyeccion,
-                x="Mes",
-                y="Utilidad Neta",
-                color="Licenciatura",
-                title="📊 Proyección de Utilidad Neta por Licenciatura",
-                markers=True
+            bloques, fig = cartera_incremental(
+                "proyeccion", ProyeccionIncremental, (horizonte, tasa_matricula, tasa_costos), etiquetas_meses(horizonte),
+                "📊 Proyección de Utilidad Neta por Licenciatura", "Mes"
             )
-            st.plotly_chart(fig, use_container_width=True)
+            with medir_etapa("proyeccion.tabla", filas=len(bloques) * horizonte):
+                df_proyeccion, resumen = bloques.como_dataframe(), bloques.resumen()
 
-            utilidad_total = df_proyeccion["Utilidad Neta"].sum()
-            meses_rentables = df_proyeccion[df_proyeccion["Utilidad Neta"] > 0]["Mes"].nunique()
-            estudiantes_finales = df_proyeccion.groupby("Licenciatura")["Estudiantes"].last().sum()
+            mostrar_tabla(df_proyeccion)
+            mostrar_grafico(fig)
 
             st.subheader("📌 Resumen de Proyección (Total)")
             st.markdown(f"""
-            - 👥 Matrícula total final: **{int(estudiantes_finales)}** estudiantes
-            - 📈 Meses con utilidad positiva (al menos una carrera): **{meses_rentables} de {horizonte}**
-            - 💰 Utilidad acumulada total: **${utilidad_total:,.2f}**
+            - 👥 Matrícula total final: **{int(resumen["estudiantes_finales"])}** estudiantes
+            - 📈 Meses con utilidad positiva (al menos una carrera): **{resumen["meses_rentables"]} de {horizonte}**
+            - 💰 Utilidad acumulada total: **${resumen["utilidad_total"]:,.2f}**
             - 📉 Inflación mensual: **{tasa_costos:.1f}%**
             - 🔄 Crecimiento de matrícula mensual: **{tasa_matricula:.1f}%**
             """)
+
+            st.download_button(
+                "📥 Descargar Cartera Completa",
+                descarga_medida(
+                    "exportacion.libro_cartera",
+                    lambda: memorizar("exportacion", libro_cartera, df, valores_variacion(RANGO_EXPORTACION), horizonte, tasa_matricula, tasa_costos)
+                ),
+                file_name="cartera_licenciaturas.xlsx",
+                mime=MIME_EXCEL,
+                help=f"Una hoja por licenciatura con su curva de equilibrio, la simulación con variación de matrícula de ±{RANGO_EXPORTACION}% y la proyección mostrada.",
+                on_click="ignore"
+            )
         else:
             fila = df[df["Licenciatura"] == seleccion].iloc[0]
             estudiantes_iniciales = fila["Estudiantes"]
-            colegiatura = fila["Colegiatura"]
-            costo_fijo = fila["Costo Fijo"]
-            costo_variable_total = fila["Costo Variable"]
-
-            capacidad_total = estudiantes_iniciales if estudiantes_iniciales > 0 else 1
-            costo_variable_unitario = costo_variable_total / capacidad_total
-
-            meses = list(range(1, horizonte + 1))
-            estudiantes_mes, ingresos_mes, costos_fijos_mes, costos_variables_mes, egresos_mes, utilidad_mes = [], [], [], [], [], []
-
-            est = estudiantes_iniciales
-            c_fijo = costo_fijo
-            c_var = costo_variable_unitario
-
-            for mes in meses:
-                est *= (1 + tasa_matricula / 100)
-                c_fijo *= (1 + tasa_costos / 100)
-                c_var *= (1 + tasa_costos / 100)
-
-                ingresos = est * colegiatura
-                c_var_total = est * c_var
-                egresos = c_fijo + c_var_total
-                utilidad = ingresos - egresos
-
-                estudiantes_mes.append(est)
-                ingresos_mes.append(ingresos)
-                costos_fijos_mes.append(c_fijo)
-                costos_variables_mes.append(c_var_total)
-                egresos_mes.append(egresos)
-                utilidad_mes.append(utilidad)
-
-            df_proyeccion = pd.DataFrame({
-                "Mes": [f"Mes {m}" for m in meses],
-                "Estudiantes": estudiantes_mes,
-                "Ingresos": ingresos_mes,
-                "Costos Fijos": costos_fijos_mes,
-                "Costos Variables": costos_variables_mes,
-                "Egresos Totales": egresos_mes,
-                "Utilidad Neta": utilidad_mes
-            })
 
-            st.dataframe(df_proyeccion, use_container_width=True)
-
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=df_proyeccion["Mes"], y=df_proyeccion["Ingresos"], mode="lines+markers", name="Ingresos", line=dict(color="green")))
-            fig.add_trace(go.Scatter(x=df_proyeccion["Mes"], y=df_proyeccion["Egresos Totales"], mode="lines+markers", name="Egresos", line=dict(color="red")))
-            fig.add_trace(go.Bar(x=df_proyeccion["Mes"], y=df_proyeccion["Utilidad Neta"], name="Utilidad", marker_color="blue", opacity=0.5))
+            df_proyeccion, resumen, fig = calculo_memorizado(
+                "graficos", proyeccion_con_grafico,
+                estudiantes_iniciales, fila["Colegiatura"], fila["Costo Fijo"], fila["Costo Variable"],
+                horizonte, tasa_matricula, tasa_costos
+            )
 
-            fig.update_layout(title="📊 Proyección de Rentabilidad", xaxis_title="Mes", yaxis_title="Monto ($)", legend=dict(orientation="h"))
-            st.plotly_chart(fig, use_container_width=True)
+            mostrar_tabla(df_proyeccion)
+            mostrar_grafico(fig)
 
             st.subheader("📌 Resumen de Proyección")
-            utilidad_total = sum(utilidad_mes)
-            meses_rentables = sum([u > 0 for u in utilidad_mes])
-            estudiantes_finales = estudiantes_mes[-1]
-
             st.markdown(f"""
-            - 👥 Matrícula: **{int(estudiantes_iniciales)} → {int(estudiantes_finales)}** estudiantes
-            - 📈 Meses con utilidad positiva: **{meses_rentables} de {horizonte}**
-            - 💰 Utilidad acumulada: **${utilidad_total:,.2f}**
+            - 👥 Matrícula: **{int(estudiantes_iniciales)} → {int(resumen["estudiantes_finales"])}** estudiantes
+            - 📈 Meses con utilidad positiva: **{resumen["meses_rentables"]} de {horizonte}**
+            - 💰 Utilidad acumulada: **${resumen["utilidad_total"]:,.2f}**
             - 📉 Inflación mensual: **{tasa_costos:.1f}%**
             - 🔄 Crecimiento de matrícula mensual: **{tasa_matricula:.1f}%**
             """)
 
-            def exportar_proyeccion():
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-                    df_proyeccion.to_excel(writer, sheet_name="Proyección", index=False)
-                return output.getvalue()
+            boton_descarga_excel("📥 Descargar Proyección", lambda: {"Proyección": df_proyeccion}, "proyeccion_mensual.xlsx")
+
+        if analisis_riesgo:
+            st.subheader("🎲 Análisis de Riesgo")
+            if seleccion == "Todas":
+                df_riesgo, df_resumen_riesgo, fig_riesgo = calculo_memorizado(
+                    "graficos", riesgo_cartera_con_grafico, df, horizonte, tasa_matricula, tasa_costos, vol_matricula, vol_costos, simulaciones
+                )
+                mostrar_grafico(fig_riesgo)
+                mostrar_tabla(df_resumen_riesgo)
+                hojas_riesgo = {"Riesgo mensual": df_riesgo, "Riesgo acumulado": df_resumen_riesgo}
+            else:
+                df_riesgo, resultado_riesgo, fig_riesgo = calculo_memorizado(
+                    "graficos", riesgo_con_grafico,
+                    estudiantes_iniciales, fila["Colegiatura"], fila["Costo Fijo"], fila["Costo Variable"],
+                    horizonte, tasa_matricula, tasa_costos, vol_matricula, vol_costos, simulaciones
+                )
+                mostrar_grafico(fig_riesgo)
+                mostrar_tabla(df_riesgo)
+                st.markdown(f"""
+            - 🎯 Utilidad acumulada mediana: **${resultado_riesgo.utilidad_acumulada[2]:,.2f}** (P5 ${resultado_riesgo.utilidad_acumulada[0]:,.2f} · P95 ${resultado_riesgo.utilidad_acumulada[-1]:,.2f})
+            - ⚠️ Probabilidad de pérdida acumulada: **{resultado_riesgo.prob_perdida_acumulada:.1%}**
+            - 📉 Probabilidad de quedar bajo el equilibrio en el último mes: **{resultado_riesgo.prob_bajo_equilibrio[-1]:.1%}**
+            """)
+                hojas_riesgo = {"Riesgo mensual": df_riesgo}
+
+            boton_descarga_excel("📥 Descargar Análisis de Riesgo", lambda: hojas_riesgo, "riesgo_montecarlo.xlsx")
+
+        if st.toggle("🎯 Optimizar colegiaturas", key="proy_optimizar"):
+            col7, col8, col9 = st.columns(3)
+            margen_objetivo = col7.number_input("Margen objetivo (%)", min_value=0.0, max_value=99.0, value=30.0, step=1.0, key="proy_margen_objetivo")
+            tope_aumento = col8.number_input("Tope de aumento por licenciatura (%)", min_value=0.0, value=15.0, step=1.0, key="proy_tope_aumento")
+            criterio = col9.radio("Margen medido en", CRITERIOS_MARGEN, format_func={"acumulado": "Todo el horizonte", "final": "Último mes"}.get, key="proy_criterio")
+
+            datos = df if seleccion == "Todas" else df[df["Licenciatura"] == seleccion]
+            df_optimizacion, resumen_optimizacion, fig_optimizacion = calculo_memorizado(
+                "graficos", optimizacion_con_grafico, datos, horizonte, tasa_matricula, tasa_costos, margen_objetivo, tope_aumento, criterio
+            )
+
+            mostrar_tabla(df_optimizacion)
+            mostrar_grafico(fig_optimizacion)
+            if resumen_optimizacion["alcanzado"]:
+                st.success(f"✅ Margen objetivo alcanzado: {resumen_optimizacion['margen_actual']:.2f}% → {resumen_optimizacion['margen_propuesto']:.2f}%")
+            else:
+                st.warning(f"⚠️ Con el tope de {tope_aumento:.1f}% el margen solo llega a {resumen_optimizacion['margen_propuesto']:.2f}% (objetivo {margen_objetivo:.1f}%).")
+            st.markdown(f"""
+            - 🔝 Licenciaturas en el tope: **{resumen_optimizacion["licenciaturas_en_tope"]} de {len(df_optimizacion)}**
+            - 💵 Ingresos adicionales en el periodo: **${resumen_optimizacion["ingresos_adicionales"]:,.2f}**
+            """)
+
+            boton_descarga_excel("📥 Descargar Propuesta de Colegiaturas", lambda: {"Optimización": df_optimizacion}, "optimizacion_colegiaturas.xlsx")
+
+tamanos = cerrar_perfil(st.session_state.perfil)
+if diagnostico_activo:
+    perfil = st.session_state.perfil
+    with panel_diagnostico:
+        col1, col2 = st.columns(2)
+        col1.metric("Ejecución", f"{perfil.total * 1000:,.0f} ms")
+        col2.metric("Sesión", f"{perfil.memoria_sesion / 2**20:,.2f} MB")
+
+        etapas = pd.DataFrame(perfil.etapas)
+        if not etapas.empty:
+            etapas["ms"] = etapas.pop("segundos") * 1000
+            st.caption("Etapas de esta ejecución")
+            st.dataframe(etapas, hide_index=True, width="stretch")
+
+        st.caption("Claves de la sesión que más ocupan")
+        st.dataframe(
+            pd.DataFrame({"Clave": list(tamanos)[:10], "MB": [b / 2**20 for b in list(tamanos.values())[:10]]}),
+            hide_index=True, width="stretch"
+        )
 
-            st.download_button("📥 Descargar Proyección", exportar_proyeccion(), file_name="proyeccion_mensual.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        historial = list(historial_perfiles())
+        st.caption(f"Últimas {len(historial)} ejecuciones")
+        st.dataframe(
+            pd.DataFrame([
+                {"fecha": p["fecha"], "seccion": p["seccion"], "ms": p["total_segundos"] * 1000, "etapas": len(p["etapas"])}
+                for p in reversed(historial)
+            ]),
+            hide_index=True, width="stretch"
+        )
+        st.download_button(
+            "📥 Descargar métricas (JSON Lines)",
+            "".join(linea_json(p) + "\n" for p in historial),
+            file_name="metricas_equilibrio.jsonl",
+            mime="application/jsonl"
+        )
+        st.download_button(
+            "📥 Descargar etapas (CSV)",
+            tabla_etapas(historial).to_csv(index=False),
+            file_name="etapas_equilibrio.csv",
+            mime="text/csv"
+        )
@@ -0,0 +1,31 @@
+from equilibrio.motor import (
+    ColegiaturaNoViable,
+    ResultadoEquilibrio,
+    analizar_licenciatura,
+    calcular_cartera,
+    calcular_colegiatura,
+    colegiatura_cubre_variable,
+    curva_equilibrio,
+    curvas_cartera,
+    etiquetas_meses,
+    extremos_equilibrio,
+    proyectar,
+    proyectar_cartera,
+    proyectar_matriz,
+    puntos_curva,
+    punto_equilibrio,
+    recalcular_colegiatura_para_rentabilidad,
+    resumen_proyeccion,
+    resumen_proyeccion_cartera,
+    simular_cartera,
+    simular_escenarios,
+    simular_matriz,
+    valores_variacion,
+)
+from equilibrio.registro import COLUMNAS_REGISTRO, RegistroLicenciaturas
+from equilibrio.importar import COLUMNAS_IMPORTACION, importar_licenciaturas, leer_archivo
+from equilibrio.riesgo import PERCENTILES, ResultadoRiesgo, simular_riesgo, simular_riesgo_cartera
+from equilibrio.sensibilidad import SuperficieSensibilidad, rejilla, superficie_sensibilidad
+from equilibrio.optimizacion import CRITERIOS_MARGEN, optimizar_colegiaturas
+from equilibrio.almacen import Almacen
+from equilibrio.incremental import ProyeccionIncremental, SimulacionIncremental
@@ -0,0 +1,159 @@
+"""Almacén local en SQLite de licenciaturas y resultados calculados.
+
+Las licenciaturas se guardan por espacio de trabajo (un identificador que
+sobrevive a recargar el navegador) y los resultados por la huella de sus
+entradas, de modo que cualquier sesión con los mismos datos los reutiliza.
+"""
+import os
+import pickle
+import sqlite3
+import time
+from threading import Lock
+
+import pandas as pd
+
+from equilibrio.registro import COLUMNAS_REGISTRO
+
+
+RUTA_ALMACEN = os.environ.get("EQUILIBRIO_ALMACEN", os.path.join(".equilibrio", "almacen.sqlite"))
+# Etapas cuyo resultado se persiste; las demás son baratas de recalcular o
+# demasiado grandes para guardarlas en cada cambio de parámetros.
+ETAPAS_ALMACEN = ("equilibrio", "simulacion", "proyeccion", "riesgo", "optimizacion")
+# Versión del formato de los resultados del motor. Debe subir cada vez que
+# cambie lo que devuelve una función persistida (columnas, tipos, clases):
+# va en cada clave y, al abrir una base de una versión anterior, se borran
+# sus resultados.
+VERSION_RESULTADOS = 2
+LIMITE_RESULTADOS = 2_000
+ESCRITURAS_POR_PODA = 100
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS licenciaturas (
+    espacio TEXT NOT NULL,
+    nombre TEXT NOT NULL,
+    {", ".join(f'"{columna}" REAL NOT NULL' for columna in COLUMNAS_REGISTRO)},
+    PRIMARY KEY (espacio, nombre)
+);
+CREATE TABLE IF NOT EXISTS resultados (
+    clave TEXT PRIMARY KEY,
+    etapa TEXT NOT NULL,
+    espacio TEXT,
+    datos BLOB NOT NULL,
+    usado REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS resultados_espacio ON resultados (espacio);
+CREATE INDEX IF NOT EXISTS resultados_usado ON resultados (usado);
+"""
+
+
+def _versionada(clave):
+    # Otro proceso con una versión distinta puede compartir la base: sus
+    # resultados nunca coinciden con las claves de este.
+    return f"v{VERSION_RESULTADOS}:{clave}"
+
+
+class Almacen:
+    """Conexión compartida entre hilos a la base SQLite en ``ruta``.
+
+    Los resultados se serializan con ``pickle``: la base es local y solo la
+    escribe el propio dashboard, no debe abrirse una de origen desconocido.
+    Solo deben guardarse salidas del motor (DataFrames, arreglos,
+    diccionarios), no figuras, que dependen de la versión de Plotly.
+    """
+
+    def __init__(self, ruta=RUTA_ALMACEN, limite_resultados=LIMITE_RESULTADOS):
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self.ruta = ruta
+        self.limite_resultados = limite_resultados
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._candado = Lock()
+        self._escrituras = 0
+        with self._candado:
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute("PRAGMA synchronous=NORMAL")
+            self._conexion.executescript(_ESQUEMA)
+            version = self._conexion.execute("PRAGMA user_version").fetchone()[0]
+            if version < VERSION_RESULTADOS:
+                self._conexion.execute("DELETE FROM resultados WHERE clave NOT LIKE ?", (_versionada("%"),))
+                self._conexion.execute(f"PRAGMA user_version = {VERSION_RESULTADOS:d}")
+
+    def cerrar(self):
+        with self._candado:
+            self._conexion.close()
+
+    def licenciaturas(self, espacio):
+        """Licenciaturas del espacio con las columnas y tipos del registro."""
+        columnas = ", ".join(f'"{columna}"' for columna in COLUMNAS_REGISTRO)
+        with self._candado:
+            filas = self._conexion.execute(
+                f"SELECT nombre, {columnas} FROM licenciaturas WHERE espacio = ? ORDER BY rowid", (espacio,)
+            ).fetchall()
+        df = pd.DataFrame(filas, columns=["Licenciatura", *COLUMNAS_REGISTRO])
+        return df.astype(COLUMNAS_REGISTRO)
+
+    def guardar_licenciaturas(self, espacio, df):
+        """Inserta o actualiza las filas de ``df`` (columnas del registro)."""
+        columnas = [f'"{columna}"' for columna in COLUMNAS_REGISTRO]
+        asignaciones = ", ".join(f"{columna} = excluded.{columna}" for columna in columnas)
+        filas = zip(
+            [espacio] * len(df), df["Licenciatura"].astype(str),
+            *(df[columna].astype(float).tolist() for columna in COLUMNAS_REGISTRO)
+        )
+        with self._candado:
+            self._conexion.execute("BEGIN")
+            self._conexion.executemany(
+                f"INSERT INTO licenciaturas (espacio, nombre, {', '.join(columnas)}) "
+                f"VALUES ({', '.join('?' * (len(columnas) + 2))}) "
+                f"ON CONFLICT (espacio, nombre) DO UPDATE SET {asignaciones}",
+                filas,
+            )
+            self._conexion.execute("COMMIT")
+
+    def guardar_licenciatura(self, espacio, nombre, fila):
+        self.guardar_licenciaturas(espacio, pd.DataFrame([{"Licenciatura": nombre, **fila}]))
+
+    def obtener(self, clave):
+        """Resultado guardado con ``clave`` o ``None``."""
+        clave = _versionada(clave)
+        with self._candado:
+            fila = self._conexion.execute("SELECT datos FROM resultados WHERE clave = ?", (clave,)).fetchone()
+            if fila is None:
+                return None
+            self._conexion.execute("UPDATE resultados SET usado = ? WHERE clave = ?", (time.time(), clave))
+        try:
+            return pickle.loads(fila[0])
+        except Exception:
+            # Un resultado de otra versión del código se trata como ausente.
+            return None
+
+    def guardar(self, clave, etapa, valor, espacio=None):
+        clave = _versionada(clave)
+        datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._candado:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO resultados (clave, etapa, espacio, datos, usado) VALUES (?, ?, ?, ?, ?)",
+                (clave, etapa, espacio, datos, time.time()),
+            )
+            self._escrituras += 1
+            if self._escrituras % ESCRITURAS_POR_PODA == 0:
+                self._podar()
+
+    def _podar(self):
+        # Conserva los ``limite_resultados`` usados más recientemente.
+        self._conexion.execute(
+            "DELETE FROM resultados WHERE usado < (SELECT usado FROM resultados ORDER BY usado DESC LIMIT 1 OFFSET ?)",
+            (self.limite_resultados - 1,),
+        )
+
+    def vaciar_espacio(self, espacio):
+        """Borra las licenciaturas y los resultados creados desde ``espacio``.
+
+        Ambos borrados usan índices, así que el costo no depende del tamaño
+        del resto de la base.
+        """
+        with self._candado:
+            self._conexion.execute("BEGIN")
+            self._conexion.execute("DELETE FROM licenciaturas WHERE espacio = ?", (espacio,))
+            self._conexion.execute("DELETE FROM resultados WHERE espacio = ?", (espacio,))
+            self._conexion.execute("COMMIT")
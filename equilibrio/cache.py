@@ -0,0 +1,156 @@
+"""Memoización acotada de cálculos, indexada por la huella de sus entradas."""
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from equilibrio.almacen import ETAPAS_ALMACEN
+from equilibrio.diagnostico import tamano
+
+
+LIMITES_GLOBALES = {
+    "equilibrio": 128,
+    "simulacion": 64,
+    "proyeccion": 64,
+    "riesgo": 32,
+    "sensibilidad": 32,
+    "optimizacion": 32,
+    "exportacion": 16,
+    "graficos": 64,
+}
+LIMITE_GLOBAL_POR_DEFECTO = 32
+LIMITE_SESION = 48
+# Las entradas varían mucho de tamaño (una superficie de sensibilidad o un
+# libro de cartera pesan decenas de MB), así que cada caché también se
+# acota en bytes; una entrada más grande que el límite no se guarda.
+MB = 2**20
+BYTES_GLOBALES = {
+    "sensibilidad": 128 * MB,
+    "exportacion": 64 * MB,
+}
+BYTES_GLOBALES_POR_DEFECTO = 128 * MB
+BYTES_SESION = 64 * MB
+
+
+class CacheLRU:
+    """Diccionario con desalojo del elemento menos usado recientemente.
+
+    Con ``max_bytes`` también desaloja mientras la suma de los tamaños
+    estimados de los valores (``diagnostico.tamano``) pase el límite.
+    """
+
+    def __init__(self, max_entradas, max_bytes=None):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._datos = OrderedDict()
+        self._pesos = {}
+        self._candado = Lock()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def __contains__(self, clave):
+        return clave in self._datos
+
+    def obtener(self, clave, defecto=None):
+        with self._candado:
+            if clave not in self._datos:
+                return defecto
+            self._datos.move_to_end(clave)
+            return self._datos[clave]
+
+    def guardar(self, clave, valor):
+        peso = tamano(valor) if self.max_bytes is not None else 0
+        with self._candado:
+            self._quitar(clave)
+            if self.max_bytes is not None and peso > self.max_bytes:
+                return
+            self._datos[clave] = valor
+            self._pesos[clave] = peso
+            self.bytes += peso
+            while len(self._datos) > self.max_entradas or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                self._quitar(next(iter(self._datos)))
+
+    def _quitar(self, clave):
+        if clave in self._datos:
+            del self._datos[clave]
+            self.bytes -= self._pesos.pop(clave)
+
+    def vaciar(self):
+        with self._candado:
+            self._datos.clear()
+            self._pesos.clear()
+            self.bytes = 0
+
+
+_caches_globales = {}
+_candado_global = Lock()
+
+
+def cache_global(etapa):
+    with _candado_global:
+        if etapa not in _caches_globales:
+            _caches_globales[etapa] = CacheLRU(
+                LIMITES_GLOBALES.get(etapa, LIMITE_GLOBAL_POR_DEFECTO),
+                BYTES_GLOBALES.get(etapa, BYTES_GLOBALES_POR_DEFECTO),
+            )
+        return _caches_globales[etapa]
+
+
+def huella(*partes):
+    """Hash estable de números, arreglos y DataFrames."""
+    h = hashlib.blake2b(digest_size=16)
+    for parte in partes:
+        if isinstance(parte, pd.DataFrame):
+            h.update(repr(list(parte.columns)).encode())
+            h.update(pd.util.hash_pandas_object(parte, index=False).to_numpy().tobytes())
+        elif isinstance(parte, np.ndarray):
+            h.update(repr((parte.dtype.str, parte.shape)).encode())
+            h.update(np.ascontiguousarray(parte).tobytes())
+        elif isinstance(parte, dict):
+            h.update(huella(*parte.keys(), *parte.values()).encode())
+        elif isinstance(parte, (list, tuple)) and any(isinstance(x, (pd.DataFrame, np.ndarray)) for x in parte):
+            h.update(huella(*parte).encode())
+        elif isinstance(parte, np.generic):
+            h.update(repr(parte.item()).encode())
+        else:
+            h.update(repr(parte).encode())
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def memorizar(etapa, funcion, *args, sesion=None, compartir=True, almacen=None, espacio=None):
+    """Devuelve ``funcion(*args)`` reutilizando resultados previos.
+
+    Busca primero en ``sesion`` (un ``CacheLRU`` propio del usuario), luego
+    en la caché global de ``etapa``, compartida entre sesiones cuando
+    ``compartir`` es verdadero, y por último en ``almacen`` si la etapa se
+    persiste en disco; ``espacio`` marca quién creó el resultado para
+    poder borrarlo después. Los resultados no deben modificarse.
+    """
+    clave = (etapa, huella(funcion.__qualname__, *args))
+    if sesion is not None:
+        resultado = sesion.obtener(clave)
+        if resultado is not None:
+            return resultado
+
+    compartida = cache_global(etapa) if compartir else None
+    resultado = compartida.obtener(clave) if compartida is not None else None
+    if resultado is None:
+        persistir = almacen is not None and etapa in ETAPAS_ALMACEN
+        clave_almacen = ":".join(clave)
+        if persistir:
+            resultado = almacen.obtener(clave_almacen)
+        if resultado is None:
+            resultado = funcion(*args)
+            if persistir:
+                almacen.guardar(clave_almacen, etapa, resultado, espacio)
+        if compartida is not None:
+            compartida.guardar(clave, resultado)
+
+    if sesion is not None:
+        sesion.guardar(clave, resultado)
+    return resultado
@@ -0,0 +1,147 @@
+"""Tiempos por etapa de cada ejecución del dashboard y tamaño de la sesión.
+
+Cada ejecución del script tiene un ``Perfil`` con las etapas medidas
+(cálculo, armado de gráficos, serialización a Excel, envío de tablas y
+gráficos al navegador). Al cerrarlo se emite una línea JSON por el logger
+``equilibrio.diagnostico`` y, si la variable de entorno
+``EQUILIBRIO_METRICAS`` apunta a un archivo, se agrega ahí en formato JSON
+Lines para analizar sesiones lentas después.
+"""
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+
+RUTA_METRICAS = os.environ.get("EQUILIBRIO_METRICAS")
+HISTORIAL_MAXIMO = 200
+# Profundidad máxima al recorrer objetos para estimar su tamaño; evita
+# entrar en las estructuras internas de Plotly o Streamlit.
+PROFUNDIDAD_TAMANO = 6
+
+logger = logging.getLogger("equilibrio.diagnostico")
+
+
+class Perfil:
+    """Etapas medidas durante una ejecución del script."""
+
+    def __init__(self, sesion, seccion):
+        self.sesion = sesion
+        self.seccion = seccion
+        self.fecha = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        self.etapas = []
+        self.total = None
+        self.memoria_sesion = None
+        self._inicio = time.perf_counter()
+        self._ultimo = self._inicio
+
+    @contextmanager
+    def medir(self, etapa, **datos):
+        """Mide el bloque ``with``; ``datos`` (filas, trazas...) se guardan con la etapa.
+
+        El diccionario que se entrega admite agregar datos dentro del bloque.
+        """
+        registro = {"etapa": etapa, "segundos": 0.0, **datos}
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            self._ultimo = time.perf_counter()
+            registro["segundos"] = self._ultimo - inicio
+            self.etapas.append(registro)
+
+    def cerrar(self, memoria_sesion=None, terminado=True):
+        """Fija el tiempo total; devuelve ``False`` si ya estaba cerrado.
+
+        Si la ejecución se interrumpió (``st.stop``), ``terminado=False``
+        toma como fin la última etapa medida.
+        """
+        if self.total is not None:
+            return False
+        self.total = (time.perf_counter() if terminado else self._ultimo) - self._inicio
+        self.memoria_sesion = memoria_sesion
+        return True
+
+    def como_dict(self):
+        return {
+            "fecha": self.fecha,
+            "sesion": self.sesion,
+            "seccion": self.seccion,
+            "total_segundos": self.total,
+            "memoria_sesion_bytes": self.memoria_sesion,
+            "etapas": self.etapas,
+        }
+
+
+def _json(valor):
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return str(valor)
+
+
+def linea_json(registro):
+    """``registro`` en una línea JSON (formato JSON Lines)."""
+    return json.dumps(registro, ensure_ascii=False, default=_json)
+
+
+def exportar(registro, ruta=None):
+    """Emite ``registro`` como una línea JSON por el logger y en ``ruta``."""
+    linea = linea_json(registro)
+    logger.info(linea)
+    ruta = ruta or RUTA_METRICAS
+    if ruta:
+        with open(ruta, "a", encoding="utf-8") as archivo:
+            archivo.write(linea + "\n")
+    return linea
+
+
+def tamano(objeto, _vistos=None, _profundidad=0):
+    """Estimación en bytes de la memoria de ``objeto`` y lo que contiene.
+
+    Los DataFrames y arreglos se miden por sus datos; el resto se recorre
+    hasta ``PROFUNDIDAD_TAMANO`` niveles sin contar dos veces el mismo objeto.
+    """
+    vistos = set() if _vistos is None else _vistos
+    if id(objeto) in vistos:
+        return 0
+    vistos.add(id(objeto))
+
+    if isinstance(objeto, (pd.DataFrame, pd.Series)):
+        uso = objeto.memory_usage(deep=True, index=True)
+        return int(uso.sum() if isinstance(objeto, pd.DataFrame) else uso)
+    if isinstance(objeto, np.ndarray):
+        return int(objeto.nbytes)
+    propio = sys.getsizeof(objeto, 0)
+    if _profundidad >= PROFUNDIDAD_TAMANO or isinstance(objeto, (str, bytes, int, float, bool, type(None))):
+        return propio
+
+    siguiente = _profundidad + 1
+    if isinstance(objeto, dict):
+        return propio + sum(tamano(k, vistos, siguiente) + tamano(v, vistos, siguiente) for k, v in objeto.items())
+    if isinstance(objeto, (list, tuple, set, frozenset)):
+        return propio + sum(tamano(elemento, vistos, siguiente) for elemento in objeto)
+    if hasattr(objeto, "__dict__"):
+        return propio + tamano(vars(objeto), vistos, siguiente)
+    return propio
+
+
+def tamanos_sesion(estado):
+    """Bytes por clave de un mapeo tipo ``st.session_state``, de mayor a menor."""
+    vistos = set()
+    tamanos = {str(clave): tamano(estado[clave], vistos) for clave in list(estado.keys())}
+    return dict(sorted(tamanos.items(), key=lambda par: par[1], reverse=True))
+
+
+def tabla_etapas(perfiles):
+    """Una fila por etapa de cada perfil, para mostrar o exportar."""
+    filas = [
+        {"fecha": p["fecha"], "seccion": p["seccion"], "total_segundos": p["total_segundos"], **etapa}
+        for p in perfiles for etapa in p["etapas"]
+    ]
+    return pd.DataFrame(filas)
@@ -0,0 +1,224 @@
+"""Generación de libros de Excel y archivos tabulares a partir de DataFrames."""
+import os
+import re
+import tempfile
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from equilibrio.motor import curvas_cartera, proyectar_cartera, puntos_curva, simular_cartera
+
+
+MIME_EXCEL = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# A partir de este número de filas el libro se escribe en modo
+# ``constant_memory`` de xlsxwriter, que vuelca cada fila al disco en cuanto
+# se completa en lugar de mantener la hoja entera en memoria.
+UMBRAL_MEMORIA_CONSTANTE = 50_000
+FILAS_POR_BLOQUE = 10_000
+PROGRAMAS_POR_BLOQUE = 256
+FORMATOS_CARTERA = ("xlsx", "parquet", "csv")
+TABLAS_CARTERA = ("cartera", "equilibrio", "simulacion", "proyeccion")
+
+
+def _filas(df):
+    for inicio in range(0, len(df), FILAS_POR_BLOQUE):
+        bloque = df.iloc[inicio:inicio + FILAS_POR_BLOQUE].astype(object)
+        yield from bloque.where(bloque.notna(), None).itertuples(index=False, name=None)
+
+
+def escribir_tabla(hoja, fila_inicial, df, formato_encabezado=None):
+    """Escribe ``df`` desde ``fila_inicial`` y devuelve la siguiente fila libre."""
+    hoja.write_row(fila_inicial, 0, [str(columna) for columna in df.columns], formato_encabezado)
+    fila = fila_inicial
+    for fila, valores in enumerate(_filas(df), start=fila_inicial + 1):
+        hoja.write_row(fila, 0, valores)
+    return fila + 1
+
+
+def escribir_hoja(libro, nombre, df, formato_encabezado=None):
+    """Escribe ``df`` fila por fila, compatible con ``constant_memory``."""
+    hoja = libro.add_worksheet(nombre)
+    escribir_tabla(hoja, 0, df, formato_encabezado)
+    return hoja
+
+
+def libro_excel(hojas):
+    """Serializa ``{nombre_hoja: DataFrame}`` como un archivo .xlsx en bytes."""
+    output = BytesIO()
+    if sum(len(df) for df in hojas.values()) < UMBRAL_MEMORIA_CONSTANTE:
+        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+            for nombre, df in hojas.items():
+                df.to_excel(writer, sheet_name=nombre, index=False)
+        return output.getvalue()
+
+    import xlsxwriter
+    libro = xlsxwriter.Workbook(output, {"constant_memory": True, "in_memory": False, "nan_inf_to_errors": True})
+    encabezado = libro.add_format({"bold": True, "border": 1, "align": "center"})
+    for nombre, df in hojas.items():
+        escribir_hoja(libro, nombre, df, encabezado)
+    libro.close()
+    return output.getvalue()
+
+
+def nombre_hoja(nombre, usados):
+    """Nombre de hoja válido para Excel (31 caracteres) y único en el libro."""
+    base = re.sub(r"[\[\]:*?/\\]", " ", str(nombre)).strip("' ")[:31] or "Licenciatura"
+    candidato, n = base, 1
+    while candidato.lower() in usados:
+        n += 1
+        sufijo = f" ({n})"
+        candidato = base[:31 - len(sufijo)] + sufijo
+    usados.add(candidato.lower())
+    return candidato
+
+
+def calcular_bloque(bloque, valores, horizonte, tasa_matricula, tasa_costos, curva_completa=False):
+    """Equilibrio, simulación y proyección de un bloque de licenciaturas.
+
+    Devuelve ``(equilibrio, simulacion, proyeccion)`` en formato largo.
+    """
+    return (
+        curvas_cartera(bloque, curva_completa),
+        simular_cartera(bloque, valores),
+        proyectar_cartera(bloque, horizonte, tasa_matricula, tasa_costos),
+    )
+
+
+def _bloques_cartera(df, valores, horizonte, tasa_matricula, tasa_costos, programas_por_bloque, curva_completa):
+    """Calcula equilibrio, simulación y proyección por bloques de licenciaturas."""
+    for inicio in range(0, len(df), programas_por_bloque):
+        bloque = df.iloc[inicio:inicio + programas_por_bloque]
+        yield (bloque, *calcular_bloque(bloque, valores, horizonte, tasa_matricula, tasa_costos, curva_completa))
+
+
+def _exportar_cartera_excel(df, destino, valores, horizonte, tasa_matricula, tasa_costos, programas_por_bloque, curva_completa):
+    import xlsxwriter
+    libro = xlsxwriter.Workbook(destino, {"constant_memory": True, "nan_inf_to_errors": True})
+    encabezado = libro.add_format({"bold": True, "border": 1, "align": "center"})
+    titulo = libro.add_format({"bold": True, "font_size": 12})
+
+    escribir_hoja(libro, "Cartera", df, encabezado)
+    usados = {"cartera"}
+    n_cambios = len(valores)
+
+    for bloque, equilibrio, simulacion, proyeccion in _bloques_cartera(
+        df, valores, horizonte, tasa_matricula, tasa_costos, programas_por_bloque, curva_completa
+    ):
+        limites = np.concatenate([[0], np.cumsum(puntos_curva(bloque["Capacidad"], curva_completa))])
+        for i, (_, programa) in enumerate(bloque.iterrows()):
+            hoja = libro.add_worksheet(nombre_hoja(programa["Licenciatura"], usados))
+            resumen = pd.DataFrame({"Concepto": programa.index, "Valor": programa.to_numpy()})
+            secciones = [
+                ("Resumen", resumen),
+                ("Punto de Equilibrio", equilibrio.iloc[limites[i]:limites[i + 1]].drop(columns="Licenciatura")),
+                ("Simulación", simulacion.iloc[i * n_cambios:(i + 1) * n_cambios].drop(columns="Licenciatura")),
+                ("Proyección", proyeccion.iloc[i * horizonte:(i + 1) * horizonte].drop(columns="Licenciatura")),
+            ]
+            fila = 0
+            for nombre_seccion, tabla in secciones:
+                hoja.write(fila, 0, nombre_seccion, titulo)
+                fila = escribir_tabla(hoja, fila + 1, tabla, encabezado) + 1
+            # Cerrar el archivo temporal de la hoja evita mantener un
+            # descriptor abierto por licenciatura; xlsxwriter lo reabre al
+            # ensamblar el libro. ``_opt_close`` es interno (probado con
+            # xlsxwriter 3.2): si desaparece, los archivos quedan abiertos
+            # hasta ``close`` como en cualquier libro.
+            cerrar_hoja = getattr(hoja, "_opt_close", None)
+            if cerrar_hoja is not None:
+                cerrar_hoja()
+
+    libro.close()
+    return [destino]
+
+
+class EscritorTabla:
+    """Agrega bloques de filas a un archivo Parquet o CSV sin releerlo."""
+
+    def __init__(self, ruta, formato):
+        self.ruta = ruta
+        self.formato = formato
+        self._parquet = None
+        self._csv_iniciado = False
+
+    def agregar(self, df):
+        if self.formato == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.ruta, tabla.schema)
+            self._parquet.write_table(tabla.cast(self._parquet.schema))
+        else:
+            df.to_csv(self.ruta, mode="a" if self._csv_iniciado else "w", header=not self._csv_iniciado, index=False)
+            self._csv_iniciado = True
+
+    def cerrar(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def escritores_cartera(destino, formato):
+    os.makedirs(destino, exist_ok=True)
+    return {
+        nombre: EscritorTabla(os.path.join(destino, f"{nombre}.{formato}"), formato)
+        for nombre in TABLAS_CARTERA
+    }
+
+
+def agregar_bloque(escritores, bloque, equilibrio, simulacion, proyeccion):
+    # Las columnas categóricas se escriben como texto: cada bloque tiene sus
+    # propias categorías y el esquema del archivo debe ser el mismo.
+    escritores["cartera"].agregar(bloque)
+    escritores["equilibrio"].agregar(equilibrio.astype({"Licenciatura": str}))
+    escritores["simulacion"].agregar(simulacion.astype({"Licenciatura": str, "Rentabilidad": str}))
+    escritores["proyeccion"].agregar(proyeccion.astype({"Licenciatura": str, "Mes": str}))
+
+
+def _exportar_cartera_tablas(df, destino, formato, valores, horizonte, tasa_matricula, tasa_costos, programas_por_bloque, curva_completa):
+    escritores = escritores_cartera(destino, formato)
+    try:
+        for bloque, equilibrio, simulacion, proyeccion in _bloques_cartera(
+            df, valores, horizonte, tasa_matricula, tasa_costos, programas_por_bloque, curva_completa
+        ):
+            agregar_bloque(escritores, bloque, equilibrio, simulacion, proyeccion)
+    finally:
+        for escritor in escritores.values():
+            escritor.cerrar()
+    return [escritor.ruta for escritor in escritores.values() if os.path.exists(escritor.ruta)]
+
+
+def exportar_cartera(
+    df, destino, valores, horizonte, tasa_matricula, tasa_costos,
+    formato="xlsx", programas_por_bloque=PROGRAMAS_POR_BLOQUE, curva_completa=False
+):
+    """Exporta el análisis completo de la cartera escribiendo por bloques.
+
+    Con ``formato="xlsx"`` ``destino`` es la ruta del libro: una hoja
+    "Cartera" y una hoja por licenciatura con su resumen, curva de
+    equilibrio, simulación y proyección. Con "parquet" o "csv" ``destino``
+    es un directorio con un archivo por tabla en formato largo; cada bloque
+    de licenciaturas se añade como un grupo de filas. La memoria depende de
+    ``programas_por_bloque`` y no del tamaño de la cartera.
+
+    La curva de equilibrio se exporta por sus extremos salvo que
+    ``curva_completa`` pida una fila por alumno hasta la capacidad.
+
+    Devuelve la lista de archivos escritos.
+    """
+    if formato not in FORMATOS_CARTERA:
+        raise ValueError(f"Formato no soportado: {formato!r}. Usa uno de {FORMATOS_CARTERA}.")
+    if formato == "xlsx":
+        return _exportar_cartera_excel(df, destino, valores, horizonte, tasa_matricula, tasa_costos, programas_por_bloque, curva_completa)
+    return _exportar_cartera_tablas(df, destino, formato, valores, horizonte, tasa_matricula, tasa_costos, programas_por_bloque, curva_completa)
+
+
+def libro_cartera(df, valores, horizonte, tasa_matricula, tasa_costos):
+    """Libro de cartera en bytes, escrito primero a un archivo temporal."""
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "cartera.xlsx")
+        exportar_cartera(df, ruta, valores, horizonte, tasa_matricula, tasa_costos)
+        with open(ruta, "rb") as archivo:
+            return archivo.read()
@@ -0,0 +1,150 @@
+"""Carga masiva de licenciaturas desde CSV, Excel o Parquet."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from equilibrio.motor import calcular_cartera
+
+
+# Columna de la tabla -> valor por defecto (None si es obligatoria). Los
+# nombres siguen las etiquetas del formulario del dashboard.
+COLUMNAS_IMPORTACION = {
+    "Licenciatura": None,
+    "Aulas": None,
+    "Capacidad por Aula": None,
+    "Estudiantes": 0,
+    "Costos": 0.0,
+    "Gastos": 0.0,
+    "Utilidad (%)": 30.0,
+    "Colegiatura Manual": np.nan,
+    "Incluir Utilidad": None,
+}
+EXTENSIONES_IMPORTACION = ("csv", "xlsx", "parquet")
+COLUMNAS_NUMERICAS = ("Aulas", "Capacidad por Aula", "Estudiantes", "Costos", "Gastos", "Utilidad (%)", "Colegiatura Manual")
+# Columna -> (mínimo, máximo excluido, entero): los mismos límites que el
+# formulario del dashboard.
+LIMITES_IMPORTACION = {
+    "Aulas": (1, None, True),
+    "Capacidad por Aula": (1, None, True),
+    "Estudiantes": (0, None, True),
+    "Costos": (0, None, False),
+    "Gastos": (0, None, False),
+    "Utilidad (%)": (0, 100, False),
+    "Colegiatura Manual": (0, None, False),
+}
+
+
+def _clave(nombre):
+    return " ".join(str(nombre).split()).lower()
+
+
+def _booleano(serie):
+    if serie.dtype == bool:
+        return serie
+    return serie.astype(str).str.strip().str.lower().isin(["1", "1.0", "true", "si", "sí", "x", "yes"])
+
+
+def leer_archivo(archivo, nombre=None):
+    """Lee un archivo por ruta o un objeto tipo archivo con ``name``.
+
+    Si falta la biblioteca que lee el formato (openpyxl, pyarrow) se lanza
+    ``ValueError`` con el paquete a instalar.
+    """
+    nombre = nombre or getattr(archivo, "name", archivo)
+    extension = os.path.splitext(str(nombre))[1].lower().lstrip(".")
+    lectores = {"csv": pd.read_csv, "xlsx": pd.read_excel, "parquet": pd.read_parquet}
+    if extension not in lectores:
+        raise ValueError(f"Extensión no soportada: {extension!r}. Usa una de {EXTENSIONES_IMPORTACION}.")
+    try:
+        return lectores[extension](archivo)
+    except ImportError as error:
+        raise ValueError(f"No se pueden leer archivos .{extension}: {error}") from error
+
+
+def _en_blanco(serie):
+    return serie.isna() | (serie.astype(str).str.strip() == "")
+
+
+def _fuera_de_limites(columna, valores):
+    """Máscara de valores fuera de los límites del formulario y su nota."""
+    minimo, maximo, entero = LIMITES_IMPORTACION[columna]
+    fuera = valores < minimo
+    nota = f"{columna} debe ser mayor o igual a {minimo}"
+    if maximo is not None:
+        fuera |= valores >= maximo
+        nota += f" y menor a {maximo}"
+    if entero:
+        fuera |= valores != np.floor(valores)
+        nota = f"{columna} debe ser un número entero mayor o igual a {minimo}"
+    return fuera.fillna(False), nota + "."
+
+
+def normalizar_columnas(df):
+    """Renombra columnas sin importar mayúsculas ni espacios y completa opcionales.
+
+    Si no hay columna "Incluir Utilidad", se incluye el porcentaje de
+    utilidad en las filas sin colegiatura manual.
+
+    Las columnas numéricas se convierten a número. Las filas con un valor
+    obligatorio en blanco, un valor no numérico o fuera de
+    ``LIMITES_IMPORTACION`` quedan con una nota en "Observación" y las
+    columnas afectadas en cero.
+    """
+    canonicas = {_clave(columna): columna for columna in COLUMNAS_IMPORTACION}
+    df = df.rename(columns={columna: canonicas[_clave(columna)] for columna in df.columns if _clave(columna) in canonicas})
+
+    faltantes = [c for c in ("Licenciatura", "Aulas", "Capacidad por Aula") if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltantes)}.")
+
+    for columna, defecto in COLUMNAS_IMPORTACION.items():
+        if columna not in df.columns and defecto is not None:
+            df[columna] = defecto
+
+    observacion = pd.Series("", index=df.index, dtype=object)
+    nombre_faltante = _en_blanco(df["Licenciatura"])
+    observacion[nombre_faltante] = "Valor faltante en Licenciatura."
+    for columna in COLUMNAS_NUMERICAS:
+        en_blanco = _en_blanco(df[columna])
+        valores = pd.to_numeric(df[columna].where(~en_blanco), errors="coerce")
+        invalidos = valores.isna() & ~en_blanco
+        if COLUMNAS_IMPORTACION[columna] is None:
+            invalidos |= en_blanco
+        observacion[invalidos & (observacion == "")] = f"Valor faltante o no numérico en {columna}."
+        fuera, nota = _fuera_de_limites(columna, valores)
+        observacion[fuera & (observacion == "")] = nota
+        invalidos |= fuera
+        defecto = COLUMNAS_IMPORTACION[columna]
+        df[columna] = valores.where(~invalidos, 0).fillna(np.nan if defecto is None else defecto).astype(np.float64)
+    df["Observación"] = observacion
+    if "Incluir Utilidad" not in df.columns:
+        df["Incluir Utilidad"] = ~(df["Colegiatura Manual"] > 0)
+    return df
+
+
+def importar_licenciaturas(df):
+    """Calcula colegiatura y punto de equilibrio de todas las filas de ``df``.
+
+    Las filas con valores faltantes, no numéricos o fuera de los límites
+    del formulario salen con ``Viable = False`` y la nota de
+    ``normalizar_columnas``.
+    """
+    df = normalizar_columnas(df)
+    cartera = calcular_cartera(
+        df["Licenciatura"].astype(str).str.strip(),
+        df["Aulas"],
+        df["Capacidad por Aula"],
+        df["Estudiantes"],
+        df["Costos"],
+        df["Gastos"],
+        _booleano(df["Incluir Utilidad"]),
+        df["Utilidad (%)"],
+        df["Colegiatura Manual"].fillna(0.0),
+    )
+    invalidas = (df["Observación"] != "").to_numpy()
+    if invalidas.any():
+        cartera.loc[invalidas, ["Viable", "Supera Capacidad", "Supera Estudiantes"]] = False
+        cartera.loc[invalidas, "PE Alumnos"] = pd.NA
+        cartera.loc[invalidas, "Observación"] = df["Observación"].to_numpy()[invalidas]
+    return cartera
@@ -0,0 +1,209 @@
+"""Simulación y proyección de la cartera guardadas por licenciatura.
+
+Cada licenciatura ocupa una fila de matrices (licenciaturas x cambios o
+licenciaturas x meses). Al sincronizar con un ``RegistroLicenciaturas`` solo
+se recalculan las filas de las licenciaturas que cambiaron desde la última
+vez y los agregados se corrigen restando la fila vieja y sumando la nueva,
+así que el costo de una edición no depende del tamaño de la cartera.
+"""
+import numpy as np
+import pandas as pd
+
+from equilibrio.motor import COLUMNAS_PROYECCION, _categorica, _rentabilidad, etiquetas_meses, proyectar_matriz, simular_matriz
+
+
+ENTRADAS = ("Estudiantes", "Colegiatura", "Costo Fijo", "Costo Variable")
+
+
+class _BloquesCartera:
+    """Filas por licenciatura con upsert por nombre y borrado por intercambio.
+
+    Las subclases definen ``COLUMNAS`` y ``TIPOS`` de sus matrices,
+    ``_calcular`` para un grupo de licenciaturas y ``_acumular`` para
+    sumar o restar filas de sus agregados.
+    """
+    COLUMNAS = ()
+    TIPOS = ()
+
+    def __init__(self, ancho, capacidad=16):
+        self._ancho = ancho
+        self._capacidad = capacidad
+        self._marca = None
+        self._vaciar()
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def __contains__(self, nombre):
+        return nombre in self._indices
+
+    @property
+    def nombres(self):
+        return list(self._nombres)
+
+    def _vaciar(self):
+        self._indices = {}
+        self._nombres = []
+        self._matrices = [np.zeros((self._capacidad, self._ancho), dtype=tipo) for tipo in self.TIPOS]
+        self._vista = None
+        self._reiniciar_agregados()
+
+    def _crecer(self, minimo):
+        for i, matriz in enumerate(self._matrices):
+            ampliada = np.zeros((max(1, len(matriz) * 2, minimo), self._ancho), dtype=matriz.dtype)
+            ampliada[:len(matriz)] = matriz
+            self._matrices[i] = ampliada
+
+    def fila(self, nombre, columna):
+        """Valores de ``columna`` para ``nombre``, sin copiar."""
+        return self._matrices[self.COLUMNAS.index(columna)][self._indices[nombre]]
+
+    def sincronizar(self, registro):
+        """Aplica los cambios de ``registro`` desde la última sincronización.
+
+        Devuelve ``(actualizados, eliminados)`` con los nombres afectados, o
+        ``None`` si hubo que recalcular todo (primera vez o registro vaciado).
+        """
+        cambios = registro.cambios_desde(self._marca)
+        self._marca = registro.marca()
+        if cambios is None:
+            self._vaciar()
+            nombres, valores = registro.seleccionar(registro.como_dataframe()["Licenciatura"])
+            self._actualizar(nombres, valores)
+            return None
+
+        nombres, valores = registro.seleccionar(cambios)
+        presentes = set(nombres)
+        eliminados = [nombre for nombre in cambios if nombre not in presentes and nombre in self._indices]
+        for nombre in eliminados:
+            self._eliminar(nombre)
+        self._actualizar(nombres, valores)
+        return nombres, eliminados
+
+    def _actualizar(self, nombres, valores):
+        if not nombres:
+            return
+        nuevas = self._calcular(*(valores[columna] for columna in ENTRADAS))
+
+        total = len(self._nombres)
+        indices = np.empty(len(nombres), dtype=np.int64)
+        for posicion, nombre in enumerate(nombres):
+            indice = self._indices.get(nombre)
+            if indice is None:
+                indice = len(self._nombres)
+                self._indices[nombre] = indice
+                self._nombres.append(nombre)
+            indices[posicion] = indice
+        if len(self._nombres) > len(self._matrices[0]):
+            self._crecer(len(self._nombres))
+
+        existentes = indices[indices < total]
+        if len(existentes):
+            self._acumular([matriz[existentes] for matriz in self._matrices], -1)
+        for matriz, nueva in zip(self._matrices, nuevas):
+            matriz[indices] = nueva
+        self._acumular(nuevas, 1)
+        self._vista = None
+
+    def _eliminar(self, nombre):
+        indice = self._indices.pop(nombre)
+        self._acumular([matriz[indice:indice + 1] for matriz in self._matrices], -1)
+        ultimo = len(self._nombres) - 1
+        if indice != ultimo:
+            nombre_ultimo = self._nombres[ultimo]
+            self._nombres[indice] = nombre_ultimo
+            self._indices[nombre_ultimo] = indice
+            for matriz in self._matrices:
+                matriz[indice] = matriz[ultimo]
+        self._nombres.pop()
+        if not self._nombres:
+            # Sin filas, los agregados vuelven a cero exacto.
+            self._reiniciar_agregados()
+        self._vista = None
+
+    def _activas(self):
+        return [matriz[:len(self._nombres)] for matriz in self._matrices]
+
+    def como_dataframe(self):
+        """Formato largo, igual al de la función de cartera equivalente.
+
+        Las filas de cada licenciatura coinciden; el orden entre
+        licenciaturas puede no ser el del registro.
+        """
+        if self._vista is None:
+            self._vista = self._tabla(np.array(self._nombres, dtype=object), self._activas())
+        return self._vista
+
+
+class SimulacionIncremental(_BloquesCartera):
+    """``simular_cartera`` por bloques, con la utilidad total por cambio."""
+    COLUMNAS = ("Estudiantes", "Ingresos", "Egresos", "Utilidad Neta")
+    TIPOS = (np.int64, np.float64, np.float64, np.float64)
+
+    def __init__(self, valores, capacidad=16):
+        self.valores = np.asarray(valores, dtype=np.int64)
+        super().__init__(len(self.valores), capacidad)
+
+    def _calcular(self, estudiantes, colegiatura, costo_fijo, costo_variable):
+        return simular_matriz(estudiantes, colegiatura, costo_fijo, costo_variable, self.valores)
+
+    def _reiniciar_agregados(self):
+        self.utilidad_por_cambio = np.zeros(self._ancho)
+
+    def _acumular(self, matrices, signo):
+        self.utilidad_por_cambio += signo * matrices[3].sum(axis=0)
+
+    def _tabla(self, nombres, matrices):
+        simulados, ingresos, egresos, utilidad = matrices
+        return pd.DataFrame({
+            "Licenciatura": _categorica(nombres, np.repeat(np.arange(len(nombres)), self._ancho)),
+            "Cambio (%)": np.tile(self.valores, len(nombres)),
+            "Estudiantes": simulados.ravel(),
+            "Ingresos": ingresos.ravel(),
+            "Egresos": egresos.ravel(),
+            "Utilidad Neta": utilidad.ravel(),
+            "Rentabilidad": _rentabilidad(utilidad.ravel()),
+        })
+
+
+class ProyeccionIncremental(_BloquesCartera):
+    """``proyectar_cartera`` por bloques, con el resumen de la cartera al día."""
+    COLUMNAS = tuple(COLUMNAS_PROYECCION[1:])
+    TIPOS = (np.float64,) * len(COLUMNAS_PROYECCION[1:])
+
+    def __init__(self, horizonte, tasa_matricula, tasa_costos, capacidad=16):
+        self.horizonte = horizonte
+        self.tasa_matricula = tasa_matricula
+        self.tasa_costos = tasa_costos
+        super().__init__(horizonte, capacidad)
+
+    def _calcular(self, estudiantes, colegiatura, costo_fijo, costo_variable):
+        return proyectar_matriz(estudiantes, colegiatura, costo_fijo, costo_variable, self.horizonte, self.tasa_matricula, self.tasa_costos)
+
+    def _reiniciar_agregados(self):
+        self._utilidad_total = 0.0
+        self._estudiantes_finales = 0.0
+        # Licenciaturas con utilidad positiva en cada mes.
+        self._rentables_por_mes = np.zeros(self._ancho, dtype=np.int64)
+
+    def _acumular(self, matrices, signo):
+        est, utilidad = matrices[0], matrices[-1]
+        self._utilidad_total += signo * float(utilidad.sum())
+        self._estudiantes_finales += signo * float(est[:, -1].sum())
+        self._rentables_por_mes += signo * (utilidad > 0).sum(axis=0)
+
+    def resumen(self):
+        """Mismas claves que ``resumen_proyeccion_cartera``."""
+        return {
+            "utilidad_total": self._utilidad_total,
+            "meses_rentables": int((self._rentables_por_mes > 0).sum()),
+            "estudiantes_finales": self._estudiantes_finales,
+        }
+
+    def _tabla(self, nombres, matrices):
+        datos = {
+            "Licenciatura": _categorica(nombres, np.repeat(np.arange(len(nombres)), self._ancho)),
+            "Mes": _categorica(etiquetas_meses(self._ancho), np.tile(np.arange(self._ancho), len(nombres))),
+        }
+        datos.update({columna: matriz.ravel() for columna, matriz in zip(self.COLUMNAS, matrices)})
+        return pd.DataFrame(datos)
@@ -0,0 +1,161 @@
+"""Ejecución por lotes del análisis de toda la cartera, sin navegador.
+
+Uso::
+
+    python -m equilibrio.lote licenciaturas.csv resultados/ \
+        --rango 100 --horizonte 120 --tasa-matricula 0.5 --tasa-costos 2
+
+Lee las licenciaturas con las mismas columnas que la importación del
+dashboard, calcula equilibrio, simulación y proyección repartiendo bloques
+de licenciaturas entre procesos y escribe los resultados en ``salida``.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from equilibrio.exportar import (
+    FORMATOS_CARTERA,
+    PROGRAMAS_POR_BLOQUE,
+    EscritorTabla,
+    agregar_bloque,
+    calcular_bloque,
+    escritores_cartera,
+    exportar_cartera,
+    libro_excel,
+)
+from equilibrio.importar import importar_licenciaturas, leer_archivo
+from equilibrio.motor import valores_variacion
+
+
+def _bloques(df, programas_por_bloque):
+    for inicio in range(0, len(df), programas_por_bloque):
+        yield df.iloc[inicio:inicio + programas_por_bloque]
+
+
+def _calcular_en_paralelo(df, escritores, parametros, procesos, programas_por_bloque):
+    """Reparte los bloques entre procesos y escribe los resultados en orden.
+
+    Solo se mantienen ``2 * procesos`` bloques en vuelo para que la memoria
+    no crezca con el tamaño de la cartera.
+    """
+    pendientes = []
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        for bloque in _bloques(df, programas_por_bloque):
+            pendientes.append((bloque, pool.submit(calcular_bloque, bloque, *parametros)))
+            if len(pendientes) >= 2 * procesos:
+                bloque_listo, futuro = pendientes.pop(0)
+                agregar_bloque(escritores, bloque_listo, *futuro.result())
+        for bloque_listo, futuro in pendientes:
+            agregar_bloque(escritores, bloque_listo, *futuro.result())
+
+
+def ejecutar(entrada, salida, rango=100, paso=10, horizonte=12, tasa_matricula=0.0, tasa_costos=2.0,
+             formato="parquet", procesos=None, programas_por_bloque=PROGRAMAS_POR_BLOQUE, curva_completa=False):
+    """Corre el análisis completo y devuelve un resumen con los tiempos por etapa."""
+    tiempos = {}
+    inicio = time.perf_counter()
+
+    df_importado = importar_licenciaturas(leer_archivo(entrada))
+    cartera = df_importado[df_importado["Viable"]].reset_index(drop=True)
+    no_viables = df_importado[~df_importado["Viable"]]
+    tiempos["lectura"] = time.perf_counter() - inicio
+
+    os.makedirs(salida, exist_ok=True)
+    valores = valores_variacion(rango, paso)
+    parametros = (valores, horizonte, tasa_matricula, tasa_costos, curva_completa)
+    procesos = procesos or os.cpu_count() or 1
+
+    marca = time.perf_counter()
+    if formato == "xlsx":
+        # Un libro de Excel se escribe de forma secuencial; el costo está en
+        # la serialización, no en el cálculo.
+        exportar_cartera(
+            cartera, os.path.join(salida, "cartera.xlsx"), valores, horizonte, tasa_matricula, tasa_costos,
+            formato="xlsx", programas_por_bloque=programas_por_bloque, curva_completa=curva_completa
+        )
+    else:
+        escritores = escritores_cartera(salida, formato)
+        try:
+            if procesos == 1:
+                for bloque in _bloques(cartera, programas_por_bloque):
+                    agregar_bloque(escritores, bloque, *calcular_bloque(bloque, *parametros))
+            else:
+                _calcular_en_paralelo(cartera, escritores, parametros, procesos, programas_por_bloque)
+        finally:
+            for escritor in escritores.values():
+                escritor.cerrar()
+
+    if len(no_viables) > 0:
+        no_viables = no_viables.astype({"PE Alumnos": "float64"})
+        if formato == "xlsx":
+            with open(os.path.join(salida, "no_viables.xlsx"), "wb") as archivo:
+                archivo.write(libro_excel({"No viables": no_viables}))
+        else:
+            escritor = EscritorTabla(os.path.join(salida, f"no_viables.{formato}"), formato)
+            escritor.agregar(no_viables)
+            escritor.cerrar()
+    tiempos["calculo_y_escritura"] = time.perf_counter() - marca
+    tiempos["total"] = time.perf_counter() - inicio
+
+    resumen = {
+        "entrada": str(entrada),
+        "licenciaturas": int(len(cartera)),
+        "no_viables": int(len(no_viables)),
+        "escenarios": len(valores),
+        "horizonte": horizonte,
+        "tasa_matricula": tasa_matricula,
+        "tasa_costos": tasa_costos,
+        "formato": formato,
+        "procesos": procesos if formato != "xlsx" else 1,
+        "tiempos": tiempos,
+    }
+    with open(os.path.join(salida, "resumen.json"), "w", encoding="utf-8") as archivo:
+        json.dump(resumen, archivo, ensure_ascii=False, indent=2)
+    return resumen
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m equilibrio.lote",
+        description="Punto de equilibrio, simulación y proyección de toda la cartera de licenciaturas.",
+    )
+    parser.add_argument("entrada", help="Archivo CSV, Excel o Parquet con las licenciaturas.")
+    parser.add_argument("salida", help="Directorio donde se escriben los resultados.")
+    parser.add_argument("--rango", type=int, default=100, help="Variación máxima de estudiantes en la simulación (%%).")
+    parser.add_argument("--paso", type=int, default=10, help="Paso de la variación de estudiantes (%%).")
+    parser.add_argument("--horizonte", type=int, default=12, help="Meses de proyección.")
+    parser.add_argument("--tasa-matricula", type=float, default=0.0, help="Crecimiento mensual de matrícula (%%).")
+    parser.add_argument("--tasa-costos", type=float, default=2.0, help="Inflación mensual de costos (%%).")
+    parser.add_argument("--formato", choices=FORMATOS_CARTERA, default="parquet")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos de cálculo; por defecto, todos los núcleos.")
+    parser.add_argument("--bloque", type=int, default=PROGRAMAS_POR_BLOQUE, help="Licenciaturas por bloque de cálculo.")
+    parser.add_argument("--curva-completa", action="store_true", help="Exportar la curva de equilibrio alumno por alumno.")
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    try:
+        resumen = ejecutar(
+            args.entrada, args.salida,
+            rango=args.rango, paso=args.paso, horizonte=args.horizonte,
+            tasa_matricula=args.tasa_matricula, tasa_costos=args.tasa_costos,
+            formato=args.formato, procesos=args.procesos,
+            programas_por_bloque=args.bloque, curva_completa=args.curva_completa,
+        )
+    except (OSError, ValueError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+
+    tiempos = resumen["tiempos"]
+    print(f"{resumen['licenciaturas']} licenciaturas analizadas ({resumen['no_viables']} no viables) con {resumen['procesos']} procesos.")
+    print(f"Lectura: {tiempos['lectura']:.2f} s | Cálculo y escritura: {tiempos['calculo_y_escritura']:.2f} s | Total: {tiempos['total']:.2f} s")
+    print(f"Resultados en {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
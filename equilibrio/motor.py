@@ -0,0 +1,369 @@
+"""Motor de cálculo del punto de equilibrio.
+
+No importa Streamlit ni Plotly: las funciones reciben números o arreglos y
+devuelven resultados tipados o DataFrames, de modo que el dashboard, los
+procesos por lotes y los benchmarks comparten exactamente la misma lógica.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+COLUMNAS_SIMULACION = ["Cambio (%)", "Estudiantes", "Ingresos", "Egresos", "Utilidad Neta", "Rentabilidad"]
+COLUMNAS_PROYECCION = ["Mes", "Estudiantes", "Ingresos", "Costos Fijos", "Costos Variables", "Egresos Totales", "Utilidad Neta"]
+
+
+class ColegiaturaNoViable(ValueError):
+    """La colegiatura no se puede calcular o no cubre el costo variable por estudiante."""
+
+
+@dataclass(frozen=True)
+class ResultadoEquilibrio:
+    colegiatura: float
+    capacidad_total: int
+    costo_variable_unitario: float
+    costo_fijo: float
+    estudiantes: float
+    punto_equilibrio: int
+
+    @property
+    def ingresos(self) -> float:
+        return self.estudiantes * self.colegiatura
+
+    @property
+    def egresos(self) -> float:
+        return self.costo_fijo + (self.estudiantes * self.costo_variable_unitario)
+
+    @property
+    def utilidad(self) -> float:
+        return self.ingresos - self.egresos
+
+    @property
+    def rentable(self) -> bool:
+        return self.ingresos >= self.egresos
+
+    @property
+    def supera_capacidad(self) -> bool:
+        return self.punto_equilibrio > self.capacidad_total
+
+    @property
+    def supera_estudiantes(self) -> bool:
+        return self.punto_equilibrio > self.estudiantes
+
+
+def calcular_colegiatura(num_aulas, capacidad_aula, estudiantes_actuales, costo_fijo, costo_variable, incluir_utilidad, utilidad_pct, colegiatura_manual):
+    """Colegiatura, capacidad total y costo variable por lugar del formulario.
+
+    Con ``incluir_utilidad`` lanza ``ColegiaturaNoViable`` en los mismos
+    casos que ``calcular_cartera`` marca como no viables: utilidad de 100 %
+    o más, o capacidad total cero.
+    """
+    capacidad_total = num_aulas * capacidad_aula
+    costo_variable_unitario = costo_variable / capacidad_total if capacidad_total > 0 else 0
+    if incluir_utilidad:
+        if utilidad_pct >= 100:
+            raise ColegiaturaNoViable("El porcentaje de utilidad debe ser menor a 100%.")
+        if capacidad_total <= 0:
+            raise ColegiaturaNoViable("La capacidad total debe ser mayor a cero.")
+        colegiatura = (costo_fijo + costo_variable) / capacidad_total
+        colegiatura = colegiatura / (1 - (utilidad_pct / 100))
+    else:
+        colegiatura = colegiatura_manual
+    return colegiatura, capacidad_total, costo_variable_unitario
+
+
+def punto_equilibrio(colegiatura, costo_variable_estudiante, costo_fijo_total):
+    """Alumnos necesarios para cubrir costos, redondeado hacia arriba."""
+    if colegiatura <= costo_variable_estudiante:
+        raise ColegiaturaNoViable(
+            f"La colegiatura ({colegiatura:.2f}) es menor o igual al costo variable por estudiante ({costo_variable_estudiante:.2f})."
+        )
+    return int(np.ceil(costo_fijo_total / (colegiatura - costo_variable_estudiante)))
+
+
+def colegiatura_cubre_variable(costo_variable_estudiante):
+    """Colegiatura mínima sugerida cuando no se cubre el costo variable."""
+    return costo_variable_estudiante + 1
+
+
+def recalcular_colegiatura_para_rentabilidad(costo_variable_estudiante, costo_fijo_total, estudiantes_final):
+    if estudiantes_final <= 0:
+        raise ColegiaturaNoViable("No hay estudiantes para repartir el costo fijo.")
+    nueva_colegiatura = costo_variable_estudiante + (costo_fijo_total / estudiantes_final)
+    nueva_colegiatura = np.ceil(nueva_colegiatura)
+    nuevo_pe = int(np.ceil(costo_fijo_total / (nueva_colegiatura - costo_variable_estudiante)))
+    return nueva_colegiatura, nuevo_pe
+
+
+def analizar_licenciatura(colegiatura, costo_variable_estudiante, costo_fijo_total, capacidad_total, estudiantes):
+    return ResultadoEquilibrio(
+        colegiatura=colegiatura,
+        capacidad_total=capacidad_total,
+        costo_variable_unitario=costo_variable_estudiante,
+        costo_fijo=costo_fijo_total,
+        estudiantes=estudiantes,
+        punto_equilibrio=punto_equilibrio(colegiatura, costo_variable_estudiante, costo_fijo_total),
+    )
+
+
+def calcular_cartera(nombres, num_aulas, capacidad_aula, estudiantes_actuales, costo_fijo, costo_variable, incluir_utilidad, utilidad_pct, colegiatura_manual):
+    """Versión vectorizada de ``calcular_colegiatura`` y del punto de equilibrio.
+
+    Aplica las mismas reglas que el formulario a todas las licenciaturas a la
+    vez. En lugar de detenerse ante una colegiatura que no cubre el costo
+    variable, marca la fila con ``Viable = False`` y una observación. Lo
+    mismo con los valores que el formulario no acepta: aulas o capacidad
+    menores a 1, conteos no enteros, montos negativos o utilidad negativa.
+    """
+    conteos = [np.asarray(valores, dtype=np.float64) for valores in (num_aulas, capacidad_aula, estudiantes_actuales)]
+    en_limites = (conteos[0] >= 1) & (conteos[1] >= 1) & (conteos[2] >= 0)
+    for valores in conteos:
+        en_limites &= valores == np.floor(valores)
+    num_aulas, capacidad_aula, estudiantes_actuales = (np.where(en_limites, valores, 0).astype(np.int64) for valores in conteos)
+    costo_fijo = np.asarray(costo_fijo, dtype=np.float64)
+    costo_variable = np.asarray(costo_variable, dtype=np.float64)
+    incluir_utilidad = np.asarray(incluir_utilidad, dtype=bool)
+    utilidad_pct = np.asarray(utilidad_pct, dtype=np.float64)
+    colegiatura_manual = np.asarray(colegiatura_manual, dtype=np.float64)
+
+    capacidad_total = num_aulas * capacidad_aula
+    hay_capacidad = capacidad_total > 0
+    capacidad = np.where(hay_capacidad, capacidad_total, 1).astype(np.float64)
+    c_var_unit = np.where(hay_capacidad, costo_variable / capacidad, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        colegiatura_utilidad = ((costo_fijo + costo_variable) / capacidad) / (1 - (utilidad_pct / 100))
+    colegiatura = np.where(incluir_utilidad, colegiatura_utilidad, colegiatura_manual)
+    estudiantes = np.where(incluir_utilidad, capacidad_total, estudiantes_actuales)
+
+    observacion = np.full(len(colegiatura), "", dtype=object)
+    observacion[colegiatura <= c_var_unit] = "La colegiatura es menor o igual al costo variable por estudiante."
+    observacion[incluir_utilidad & (utilidad_pct >= 100)] = "El porcentaje de utilidad debe ser menor a 100%."
+    observacion[~hay_capacidad] = "La capacidad total debe ser mayor a cero."
+    en_limites &= (costo_fijo >= 0) & (costo_variable >= 0) & (utilidad_pct >= 0)
+    observacion[~en_limites] = "Aulas y capacidad deben ser enteros de al menos 1, estudiantes un entero no negativo y costos, gastos y utilidad no negativos."
+    viable = observacion == ""
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        punto_equilibrio = np.ceil(costo_fijo / (colegiatura - c_var_unit))
+        ingresos = estudiantes * colegiatura
+        egresos = costo_fijo + (estudiantes * c_var_unit)
+    pe_alumnos = pd.array(np.where(viable, punto_equilibrio, 0).astype(np.int64), dtype="Int64")
+    pe_alumnos[~viable] = pd.NA
+
+    return pd.DataFrame({
+        "Licenciatura": np.asarray(nombres, dtype=object),
+        "Estudiantes": estudiantes,
+        "Capacidad": capacidad_total,
+        "Colegiatura": colegiatura,
+        "Costo Fijo": costo_fijo,
+        "Costo Variable": costo_variable,
+        "PE Alumnos": pe_alumnos,
+        "Ingresos Totales": ingresos,
+        "Egresos Totales": egresos,
+        "Utilidad Neta": ingresos - egresos,
+        "Viable": viable,
+        "Supera Capacidad": viable & (punto_equilibrio > capacidad_total),
+        "Supera Estudiantes": viable & (punto_equilibrio > estudiantes),
+        "Observación": observacion,
+    })
+
+
+def _tabla_equilibrio(alumnos, colegiatura, costo_variable_estudiante, costo_fijo_total):
+    return pd.DataFrame({
+        "Alumnos": alumnos,
+        "Ingresos": alumnos * colegiatura,
+        "Egresos": costo_fijo_total + (alumnos * costo_variable_estudiante),
+    })
+
+
+def curva_equilibrio(colegiatura, costo_variable_estudiante, costo_fijo_total, capacidad_total):
+    """Tabla completa de ingresos y egresos para cada alumno hasta la capacidad."""
+    alumnos = np.arange(1, int(capacidad_total) + 1)
+    return _tabla_equilibrio(alumnos, colegiatura, costo_variable_estudiante, costo_fijo_total)
+
+
+def extremos_equilibrio(colegiatura, costo_variable_estudiante, costo_fijo_total, capacidad_total):
+    """Primer y último alumno de la curva.
+
+    Ingresos y egresos son rectas, así que estos dos puntos bastan para
+    graficarlas sin importar la capacidad.
+    """
+    alumnos = np.unique(np.array([1, max(1, int(capacidad_total))]))
+    return _tabla_equilibrio(alumnos, colegiatura, costo_variable_estudiante, costo_fijo_total)
+
+
+def valores_variacion(rango, paso=10):
+    return list(range(-rango, rango + paso, paso))
+
+
+def puntos_curva(capacidad_total, completa=False):
+    """Filas que ocupa la curva de cada licenciatura en ``curvas_cartera``."""
+    capacidad_total = np.asarray(capacidad_total, dtype=np.int64)
+    if completa:
+        return np.maximum(capacidad_total, 0)
+    return np.where(capacidad_total > 1, 2, 1)
+
+
+def curvas_cartera(df, completa=False):
+    """Curvas de equilibrio de todas las licenciaturas en formato largo.
+
+    Equivale a concatenar ``extremos_equilibrio`` (o ``curva_equilibrio`` si
+    ``completa``) de cada fila, usando la capacidad para repartir el costo
+    variable, pero sin construir un DataFrame por licenciatura.
+    """
+    capacidad = df["Capacidad"].to_numpy(dtype=np.int64)
+    colegiatura = df["Colegiatura"].to_numpy(dtype=np.float64)
+    costo_fijo = df["Costo Fijo"].to_numpy(dtype=np.float64)
+    c_var_unit = _costo_variable_unitario(df["Costo Variable"].to_numpy(dtype=np.float64), capacidad.astype(np.float64))
+
+    puntos = puntos_curva(capacidad, completa)
+    fila = np.repeat(np.arange(len(df)), puntos)
+    if completa:
+        inicio = np.repeat(np.cumsum(puntos) - puntos, puntos)
+        alumnos = np.arange(len(fila)) - inicio + 1
+    else:
+        ultimo = np.repeat(np.maximum(capacidad, 1), puntos)
+        primero = np.concatenate([[True], fila[1:] != fila[:-1]]) if len(fila) else np.zeros(0, dtype=bool)
+        alumnos = np.where(primero, 1, ultimo)
+
+    tabla = _tabla_equilibrio(alumnos, colegiatura[fila], c_var_unit[fila], costo_fijo[fila])
+    tabla.insert(0, "Licenciatura", _categorica(df["Licenciatura"], fila))
+    return tabla
+
+
+def _columnas_cartera(df):
+    return (
+        df["Estudiantes"].to_numpy(dtype=np.float64),
+        df["Colegiatura"].to_numpy(dtype=np.float64),
+        df["Costo Fijo"].to_numpy(dtype=np.float64),
+        df["Costo Variable"].to_numpy(dtype=np.float64),
+    )
+
+
+def _costo_variable_unitario(costo_variable, estudiantes):
+    return np.divide(costo_variable, estudiantes, out=np.zeros_like(costo_variable), where=estudiantes > 0)
+
+
+def _categorica(valores, indices):
+    """``valores[indices]`` como columna categórica: cada cadena se guarda una vez."""
+    codigos, categorias = pd.factorize(np.asarray(valores, dtype=object))
+    return pd.Categorical.from_codes(codigos[indices], categories=categorias)
+
+
+def _rentabilidad(utilidad):
+    return pd.Categorical.from_codes((utilidad >= 0).astype(np.int8), categories=["No Rentable", "Rentable"])
+
+
+def simular_matriz(estudiantes, colegiatura, costo_fijo, costo_variable, valores):
+    """Rejilla licenciaturas x cambios en una sola operación vectorizada.
+
+    Devuelve (estudiantes, ingresos, egresos, utilidad) con forma
+    (licenciaturas, cambios). Los estudiantes se truncan igual que
+    ``max(0, int(...))``.
+    """
+    estudiantes = np.asarray(estudiantes, dtype=np.float64).reshape(-1, 1)
+    colegiatura = np.asarray(colegiatura, dtype=np.float64).reshape(-1, 1)
+    costo_fijo = np.asarray(costo_fijo, dtype=np.float64).reshape(-1, 1)
+    costo_variable = np.asarray(costo_variable, dtype=np.float64).reshape(-1, 1)
+    cambios = np.asarray(valores, dtype=np.float64).reshape(1, -1)
+
+    c_var_unit = _costo_variable_unitario(costo_variable, estudiantes)
+    simulados = np.maximum(0, np.trunc(estudiantes * (1 + cambios / 100))).astype(np.int64)
+    ingresos = simulados * colegiatura
+    egresos = costo_fijo + (simulados * c_var_unit)
+    return simulados, ingresos, egresos, ingresos - egresos
+
+
+def simular_escenarios(estudiantes, colegiatura, costo_fijo, costo_variable, valores):
+    """Variación porcentual de la matrícula con colegiatura y costos fijos."""
+    simulados, ingresos, egresos, utilidad = simular_matriz(estudiantes, colegiatura, costo_fijo, costo_variable, valores)
+    return pd.DataFrame({
+        "Cambio (%)": np.asarray(valores),
+        "Estudiantes": simulados[0],
+        "Ingresos": ingresos[0],
+        "Egresos": egresos[0],
+        "Utilidad Neta": utilidad[0],
+        "Rentabilidad": _rentabilidad(utilidad[0]),
+    })
+
+
+def simular_cartera(df, valores):
+    """Simulación de escenarios para todas las licenciaturas, en formato largo."""
+    simulados, ingresos, egresos, utilidad = simular_matriz(*_columnas_cartera(df), valores)
+    n_cambios = len(valores)
+    return pd.DataFrame({
+        "Licenciatura": _categorica(df["Licenciatura"], np.repeat(np.arange(len(df)), n_cambios)),
+        "Cambio (%)": np.tile(np.asarray(valores, dtype=np.int64), len(df)),
+        "Estudiantes": simulados.ravel(),
+        "Ingresos": ingresos.ravel(),
+        "Egresos": egresos.ravel(),
+        "Utilidad Neta": utilidad.ravel(),
+        "Rentabilidad": _rentabilidad(utilidad.ravel()),
+    })
+
+
+def etiquetas_meses(horizonte):
+    return np.array([f"Mes {mes}" for mes in range(1, horizonte + 1)], dtype=object)
+
+
+def proyectar_matriz(estudiantes, colegiatura, costo_fijo, costo_variable, horizonte, tasa_matricula, tasa_costos):
+    """Matriz licenciaturas x meses de la proyección en forma cerrada.
+
+    Cada serie mensual es geométrica, así que el mes ``t`` se obtiene con
+    potencias del factor de crecimiento en lugar de acumular mes a mes.
+    Devuelve (estudiantes, ingresos, costos_fijos, costos_variables,
+    egresos, utilidad), cada uno con forma (licenciaturas, horizonte).
+    """
+    estudiantes = np.asarray(estudiantes, dtype=np.float64).reshape(-1, 1)
+    colegiatura = np.asarray(colegiatura, dtype=np.float64).reshape(-1, 1)
+    costo_fijo = np.asarray(costo_fijo, dtype=np.float64).reshape(-1, 1)
+    costo_variable = np.asarray(costo_variable, dtype=np.float64).reshape(-1, 1)
+
+    meses = np.arange(1, horizonte + 1, dtype=np.float64)
+    factor_matricula = (1 + tasa_matricula / 100) ** meses
+    factor_costos = (1 + tasa_costos / 100) ** meses
+
+    est = estudiantes * factor_matricula
+    c_fijo = costo_fijo * factor_costos
+    c_var_total = est * (_costo_variable_unitario(costo_variable, estudiantes) * factor_costos)
+    ingresos = est * colegiatura
+    egresos = c_fijo + c_var_total
+    return est, ingresos, c_fijo, c_var_total, egresos, ingresos - egresos
+
+
+def proyectar(estudiantes, colegiatura, costo_fijo, costo_variable, horizonte, tasa_matricula, tasa_costos):
+    """Proyección mensual con crecimiento de matrícula e inflación de costos."""
+    matrices = proyectar_matriz(estudiantes, colegiatura, costo_fijo, costo_variable, horizonte, tasa_matricula, tasa_costos)
+    datos = {"Mes": etiquetas_meses(horizonte)}
+    datos.update({columna: matriz[0] for columna, matriz in zip(COLUMNAS_PROYECCION[1:], matrices)})
+    return pd.DataFrame(datos)
+
+
+def proyectar_cartera(df, horizonte, tasa_matricula, tasa_costos):
+    """Proyección de todas las licenciaturas, en formato largo."""
+    matrices = proyectar_matriz(*_columnas_cartera(df), horizonte, tasa_matricula, tasa_costos)
+    datos = {
+        "Licenciatura": _categorica(df["Licenciatura"], np.repeat(np.arange(len(df)), horizonte)),
+        "Mes": _categorica(etiquetas_meses(horizonte), np.tile(np.arange(horizonte), len(df))),
+    }
+    datos.update({columna: matriz.ravel() for columna, matriz in zip(COLUMNAS_PROYECCION[1:], matrices)})
+    return pd.DataFrame(datos)
+
+
+def resumen_proyeccion(df_proyeccion):
+    utilidad = df_proyeccion["Utilidad Neta"]
+    return {
+        "utilidad_total": float(utilidad.sum()),
+        "meses_rentables": int((utilidad > 0).sum()),
+        "estudiantes_finales": float(df_proyeccion["Estudiantes"].iloc[-1]),
+    }
+
+
+def resumen_proyeccion_cartera(df_proyeccion):
+    return {
+        "utilidad_total": float(df_proyeccion["Utilidad Neta"].sum()),
+        "meses_rentables": int(df_proyeccion[df_proyeccion["Utilidad Neta"] > 0]["Mes"].nunique()),
+        "estudiantes_finales": float(df_proyeccion.groupby("Licenciatura", sort=False)["Estudiantes"].last().sum()),
+    }
@@ -0,0 +1,107 @@
+"""Búsqueda de colegiaturas que llevan la cartera a un margen objetivo."""
+import numpy as np
+import pandas as pd
+
+from equilibrio.motor import _columnas_cartera, proyectar_matriz
+
+
+CRITERIOS_MARGEN = ("acumulado", "final")
+ITERACIONES_BISECCION = 60
+
+
+def _margen(ingresos, egresos):
+    return np.divide(ingresos - egresos, ingresos, out=np.full_like(ingresos, np.nan), where=ingresos > 0)
+
+
+def optimizar_colegiaturas(df, horizonte, tasa_matricula, tasa_costos, margen_objetivo, tope_aumento=None,
+                           criterio="acumulado", permitir_reduccion=False):
+    """Colegiatura mínima por licenciatura para que la cartera alcance ``margen_objetivo``.
+
+    El margen (utilidad / ingresos, en %) se mide sobre la proyección con
+    las tasas dadas: la suma de los ``horizonte`` meses con
+    ``criterio="acumulado"`` o solo el último mes con ``"final"``. Como la
+    colegiatura no cambia los egresos, cada licenciatura se reduce a su
+    colegiatura de equilibrio en el periodo (egresos / alumnos).
+
+    La propuesta sube primero las licenciaturas con menor margen: cada una
+    queda en ``factor`` veces su colegiatura de equilibrio, sin bajar de la
+    actual (salvo ``permitir_reduccion``) ni pasar ``tope_aumento`` (en %,
+    escalar o uno por licenciatura). El menor ``factor`` que alcanza el
+    objetivo se busca por bisección sobre los arreglos, sin recalcular la
+    proyección.
+
+    Devuelve ``(tabla, resumen)``: la propuesta por licenciatura y un
+    diccionario con los márgenes de la cartera antes y después.
+    """
+    if criterio not in CRITERIOS_MARGEN:
+        raise ValueError(f"Criterio no soportado: {criterio!r}. Usa uno de {CRITERIOS_MARGEN}.")
+    if not 0 <= margen_objetivo < 100:
+        raise ValueError("El margen objetivo debe estar entre 0 y 100 %.")
+
+    estudiantes, colegiatura, costo_fijo, costo_variable = _columnas_cartera(df)
+    est, _, _, _, egresos, _ = proyectar_matriz(estudiantes, colegiatura, costo_fijo, costo_variable, horizonte, tasa_matricula, tasa_costos)
+    if criterio == "final":
+        alumnos, egresos = est[:, -1], egresos[:, -1]
+    else:
+        alumnos, egresos = est.sum(axis=1), egresos.sum(axis=1)
+
+    tope = np.inf if tope_aumento is None else np.asarray(tope_aumento, dtype=np.float64)
+    minima = np.zeros_like(colegiatura) if permitir_reduccion else colegiatura
+    maxima = np.maximum(minima, colegiatura * (1 + tope / 100))
+    equilibrio = np.divide(egresos, alumnos, out=np.zeros_like(egresos), where=alumnos > 0)
+
+    puede_subir = equilibrio > 0
+
+    def propuesta(factor):
+        return np.clip(factor * equilibrio, minima, maxima)
+
+    def margen_cartera(factor):
+        return _margen((propuesta(factor) * alumnos).sum(), egresos.sum())
+
+    objetivo = margen_objetivo / 100
+    # Sin topes, factor = 1 / (1 - objetivo) da el objetivo en cada
+    # licenciatura; con topes puede hacer falta más.
+    bajo, alto = 0.0, 1 / (1 - objetivo)
+    if margen_cartera(bajo) >= objetivo:
+        alto = bajo
+    else:
+        while margen_cartera(alto) < objetivo and np.any(puede_subir & (alto * equilibrio < maxima)):
+            bajo, alto = alto, alto * 2
+        for _ in range(ITERACIONES_BISECCION):
+            medio = (bajo + alto) / 2
+            if margen_cartera(medio) >= objetivo:
+                alto = medio
+            else:
+                bajo = medio
+    nivel = alto
+
+    # Se redondea al peso hacia arriba, como en el recálculo individual,
+    # sin pasar el tope; las que no cambian conservan su valor exacto.
+    nueva = propuesta(nivel)
+    nueva = np.where(nueva > minima, np.minimum(np.ceil(nueva - 1e-9), maxima), minima)
+
+    ingresos_actuales = colegiatura * alumnos
+    ingresos_nuevos = nueva * alumnos
+    with np.errstate(divide="ignore", invalid="ignore"):
+        aumento = np.where(colegiatura > 0, (nueva / colegiatura - 1) * 100, np.nan)
+
+    tabla = pd.DataFrame({
+        "Licenciatura": df["Licenciatura"].to_numpy(),
+        "Colegiatura Actual": colegiatura,
+        "Colegiatura Propuesta": nueva,
+        "Aumento (%)": aumento,
+        "Tope (%)": np.broadcast_to(tope, colegiatura.shape).astype(np.float64),
+        "En Tope": np.isfinite(maxima) & (nueva >= maxima - 1e-9) & (nueva > colegiatura),
+        "Margen Actual (%)": _margen(ingresos_actuales, egresos) * 100,
+        "Margen Propuesto (%)": _margen(ingresos_nuevos, egresos) * 100,
+    })
+    margen_final = float(_margen(ingresos_nuevos.sum(), egresos.sum()))
+    resumen = {
+        "margen_objetivo": float(margen_objetivo),
+        "margen_actual": float(_margen(ingresos_actuales.sum(), egresos.sum())) * 100,
+        "margen_propuesto": margen_final * 100,
+        "alcanzado": bool(margen_final >= objetivo - 1e-9),
+        "licenciaturas_en_tope": int(tabla["En Tope"].sum()),
+        "ingresos_adicionales": float(ingresos_nuevos.sum() - ingresos_actuales.sum()),
+    }
+    return tabla, resumen
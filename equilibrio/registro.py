@@ -0,0 +1,155 @@
+"""Registro de licenciaturas analizadas, indexado por nombre."""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+COLUMNAS_REGISTRO = {
+    "Estudiantes": np.int64,
+    "Capacidad": np.int64,
+    "Colegiatura": np.float64,
+    "Costo Fijo": np.float64,
+    "Costo Variable": np.float64,
+    "PE Alumnos": np.int64,
+    "Ingresos Totales": np.float64,
+    "Egresos Totales": np.float64,
+    "Utilidad Neta": np.float64,
+}
+
+
+class RegistroLicenciaturas:
+    """Tabla de licenciaturas con upsert O(1) por nombre.
+
+    Los valores viven en arreglos NumPy de tipo fijo que crecen por
+    duplicación; el DataFrame solo se construye cuando alguien lo pide y se
+    reutiliza hasta que el registro cambia. Cada cambio anota la versión
+    del nombre para que los cálculos derivados se actualicen por
+    licenciatura (ver ``cambios_desde``); se guarda una versión por nombre,
+    no un historial, así que la memoria no crece con las ediciones.
+    """
+
+    def __init__(self, capacidad=16):
+        self._indices = {}
+        self._nombres = []
+        self._columnas = {columna: np.zeros(capacidad, dtype=tipo) for columna, tipo in COLUMNAS_REGISTRO.items()}
+        self._vista = None
+        self._epoca = object()
+        self._version = 0
+        # Nombre -> versión de su último cambio, en orden de versión.
+        self._versiones = OrderedDict()
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def __contains__(self, nombre):
+        return nombre in self._indices
+
+    def _crecer(self, minimo=0):
+        for columna, valores in self._columnas.items():
+            ampliado = np.zeros(max(1, len(valores) * 2, minimo), dtype=valores.dtype)
+            ampliado[:len(valores)] = valores
+            self._columnas[columna] = ampliado
+
+    def guardar(self, nombre, fila):
+        """Inserta o actualiza la fila de ``nombre``.
+
+        ``fila`` usa los nombres de columna de la tabla. Si los valores no
+        cambian, la vista materializada se conserva y se devuelve ``False``.
+        """
+        fila = {columna: fila[columna] for columna in COLUMNAS_REGISTRO}
+        indice = self._indices.get(nombre)
+        if indice is None:
+            indice = len(self._nombres)
+            if indice == len(self._columnas["Colegiatura"]):
+                self._crecer()
+            self._indices[nombre] = indice
+            self._nombres.append(nombre)
+        elif all(self._columnas[columna][indice] == valor for columna, valor in fila.items()):
+            return False
+        for columna, valor in fila.items():
+            self._columnas[columna][indice] = valor
+        self._vista = None
+        self._anotar([nombre])
+        return True
+
+    def guardar_tabla(self, df):
+        """Inserta o actualiza en bloque las filas de un DataFrame.
+
+        ``df`` necesita la columna "Licenciatura" y las del registro; si un
+        nombre se repite gana la última fila.
+        """
+        df = df.drop_duplicates("Licenciatura", keep="last")
+        if df.empty:
+            return
+        indices = np.empty(len(df), dtype=np.int64)
+        for posicion, nombre in enumerate(df["Licenciatura"]):
+            indice = self._indices.get(nombre)
+            if indice is None:
+                indice = len(self._nombres)
+                self._indices[nombre] = indice
+                self._nombres.append(nombre)
+            indices[posicion] = indice
+        if len(self._nombres) > len(self._columnas["Colegiatura"]):
+            self._crecer(len(self._nombres))
+        for columna, valores in self._columnas.items():
+            valores[indices] = df[columna].to_numpy(dtype=valores.dtype)
+        self._vista = None
+        self._anotar(df["Licenciatura"])
+
+    def eliminar(self, nombre):
+        """Quita ``nombre`` moviendo la última fila a su lugar."""
+        indice = self._indices.pop(nombre)
+        ultimo = len(self._nombres) - 1
+        if indice != ultimo:
+            nombre_ultimo = self._nombres[ultimo]
+            self._nombres[indice] = nombre_ultimo
+            self._indices[nombre_ultimo] = indice
+            for valores in self._columnas.values():
+                valores[indice] = valores[ultimo]
+        self._nombres.pop()
+        self._vista = None
+        self._anotar([nombre])
+
+    def vaciar(self):
+        self.__init__()
+
+    def _anotar(self, nombres):
+        for nombre in nombres:
+            self._version += 1
+            self._versiones[nombre] = self._version
+            self._versiones.move_to_end(nombre)
+
+    def marca(self):
+        """Versión a partir de la cual pedir ``cambios_desde``."""
+        return self._epoca, self._version
+
+    def cambios_desde(self, marca):
+        """Nombres agregados, modificados o eliminados desde ``marca``.
+
+        Recorre solo los nombres cambiados después de la marca. Devuelve
+        ``None`` si la marca es de antes de vaciar el registro (o es
+        ``None``), en cuyo caso hay que recalcular todo.
+        """
+        if marca is None or marca[0] is not self._epoca:
+            return None
+        cambios = []
+        for nombre, version in reversed(self._versiones.items()):
+            if version <= marca[1]:
+                break
+            cambios.append(nombre)
+        return cambios[::-1]
+
+    def seleccionar(self, nombres):
+        """Nombres presentes de ``nombres`` y sus valores por columna."""
+        presentes = [nombre for nombre in nombres if nombre in self._indices]
+        indices = np.fromiter((self._indices[nombre] for nombre in presentes), dtype=np.int64, count=len(presentes))
+        return presentes, {columna: valores[indices] for columna, valores in self._columnas.items()}
+
+    def como_dataframe(self):
+        if self._vista is None:
+            n = len(self._nombres)
+            datos = {"Licenciatura": list(self._nombres)}
+            datos.update({columna: valores[:n].copy() for columna, valores in self._columnas.items()})
+            self._vista = pd.DataFrame(datos)
+        return self._vista
@@ -0,0 +1,159 @@
+"""Simulación Monte Carlo de matrícula e inflación de costos."""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from equilibrio.motor import _categorica, etiquetas_meses
+
+
+PERCENTILES = (5, 25, 50, 75, 95)
+# Elementos (trayectorias x meses) que se evalúan a la vez; acota la memoria
+# de los arreglos temporales sin importar simulaciones ni horizonte.
+ELEMENTOS_POR_BLOQUE = 2_000_000
+UMBRAL_PARALELO = 32
+# Procesos del pool compartido por todas las sesiones del servidor; sin
+# EQUILIBRIO_PROCESOS_RIESGO se usan hasta 4 núcleos.
+PROCESOS_RIESGO = int(os.environ.get("EQUILIBRIO_PROCESOS_RIESGO", min(4, os.cpu_count() or 1)))
+
+_pool = None
+_candado_pool = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ResultadoRiesgo:
+    percentiles: tuple
+    utilidad_mensual: np.ndarray
+    prob_bajo_equilibrio: np.ndarray
+    utilidad_acumulada: np.ndarray
+    prob_perdida_acumulada: float
+
+    def como_dataframe(self):
+        datos = {"Mes": etiquetas_meses(self.utilidad_mensual.shape[1])}
+        datos.update({f"P{p}": fila for p, fila in zip(self.percentiles, self.utilidad_mensual)})
+        datos["Prob. bajo equilibrio"] = self.prob_bajo_equilibrio
+        return pd.DataFrame(datos)
+
+
+def simular_riesgo(estudiantes, colegiatura, costo_fijo, costo_variable, horizonte, tasa_matricula, tasa_costos,
+                   volatilidad_matricula, volatilidad_costos, simulaciones=10_000, semilla=0, percentiles=PERCENTILES):
+    """Trayectorias aleatorias de la proyección de una licenciatura.
+
+    El crecimiento mensual de matrícula y la inflación mensual de costos
+    siguen normales con media ``tasa_*`` y desviación ``volatilidad_*``
+    (en puntos porcentuales). Con volatilidad cero el resultado coincide con
+    ``proyectar``. Los meses se evalúan en bloques y solo se guarda el
+    estado de cada trayectoria entre bloques.
+
+    ``semilla`` puede ser un entero o un ``np.random.SeedSequence``; la
+    matrícula y los costos usan flujos independientes y se sortean mes por
+    mes, de modo que el tamaño de bloque solo cambia el redondeo.
+    """
+    semilla = semilla if isinstance(semilla, np.random.SeedSequence) else np.random.SeedSequence(semilla)
+    rng_matricula, rng_costos = (np.random.default_rng(s) for s in semilla.spawn(2))
+
+    c_var_unit = costo_variable / estudiantes if estudiantes > 0 else 0
+    est = np.full(simulaciones, float(estudiantes))
+    factor_costos = np.ones(simulaciones)
+    acumulada = np.zeros(simulaciones)
+
+    utilidad_mensual = np.empty((len(percentiles), horizonte))
+    prob_bajo_equilibrio = np.empty(horizonte)
+    meses_por_bloque = max(1, ELEMENTOS_POR_BLOQUE // max(1, simulaciones))
+
+    for inicio in range(0, horizonte, meses_por_bloque):
+        fin = min(horizonte, inicio + meses_por_bloque)
+        forma = (fin - inicio, simulaciones)
+        crecimiento = np.maximum(0, 1 + (tasa_matricula + volatilidad_matricula * rng_matricula.standard_normal(forma)) / 100)
+        inflacion = np.maximum(0, 1 + (tasa_costos + volatilidad_costos * rng_costos.standard_normal(forma)) / 100)
+
+        est_bloque = est * np.cumprod(crecimiento, axis=0)
+        costos_bloque = factor_costos * np.cumprod(inflacion, axis=0)
+        utilidad = est_bloque * colegiatura - (costo_fijo * costos_bloque + est_bloque * c_var_unit * costos_bloque)
+
+        utilidad_mensual[:, inicio:fin] = np.percentile(utilidad, percentiles, axis=1)
+        prob_bajo_equilibrio[inicio:fin] = (utilidad < 0).mean(axis=1)
+        acumulada += utilidad.sum(axis=0)
+        est, factor_costos = est_bloque[-1], costos_bloque[-1]
+
+    return ResultadoRiesgo(
+        percentiles=tuple(percentiles),
+        utilidad_mensual=utilidad_mensual,
+        prob_bajo_equilibrio=prob_bajo_equilibrio,
+        utilidad_acumulada=np.percentile(acumulada, percentiles),
+        prob_perdida_acumulada=float((acumulada < 0).mean()),
+    )
+
+
+def _simular_fila(argumentos):
+    return simular_riesgo(*argumentos)
+
+
+def _pool_compartido():
+    # Un solo pool para todo el proceso, creado con forkserver: hacer fork
+    # de un servidor con hilos (Streamlit) puede dejar candados tomados en
+    # el hijo.
+    global _pool
+    with _candado_pool:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PROCESOS_RIESGO, mp_context=multiprocessing.get_context("forkserver"))
+        return _pool
+
+
+def _descartar_pool(pool):
+    global _pool
+    with _candado_pool:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def simular_riesgo_cartera(df, horizonte, tasa_matricula, tasa_costos, volatilidad_matricula, volatilidad_costos,
+                           simulaciones=10_000, semilla=0, procesos=1):
+    """Monte Carlo de cada licenciatura con un flujo aleatorio propio.
+
+    Devuelve ``(mensual, resumen)``: percentiles y probabilidad de quedar
+    bajo el equilibrio por mes en formato largo, y la distribución de la
+    utilidad acumulada por licenciatura. Con ``procesos`` mayor a uno y
+    carteras grandes, las licenciaturas se reparten en el pool compartido,
+    que nunca pasa de ``PROCESOS_RIESGO``; los resultados son los mismos
+    porque cada una tiene su semilla derivada.
+    """
+    semillas = np.random.SeedSequence(semilla).spawn(len(df))
+    argumentos = [
+        (est, colegiatura, c_fijo, c_var, horizonte, tasa_matricula, tasa_costos,
+         volatilidad_matricula, volatilidad_costos, simulaciones, s)
+        for est, colegiatura, c_fijo, c_var, s in zip(
+            df["Estudiantes"], df["Colegiatura"], df["Costo Fijo"], df["Costo Variable"], semillas
+        )
+    ]
+    procesos = min(procesos or PROCESOS_RIESGO, PROCESOS_RIESGO)
+    resultados = None
+    if procesos > 1 and len(df) >= UMBRAL_PARALELO:
+        pool = _pool_compartido()
+        try:
+            resultados = list(pool.map(_simular_fila, argumentos, chunksize=max(1, len(argumentos) // (4 * procesos))))
+        except BrokenProcessPool:
+            # Un proceso murió (p. ej. por memoria): se reemplaza el pool en
+            # la siguiente llamada y esta se resuelve en serie.
+            _descartar_pool(pool)
+    if resultados is None:
+        resultados = [_simular_fila(a) for a in argumentos]
+
+    nombres = df["Licenciatura"].to_numpy()
+    mensual = pd.DataFrame()
+    if resultados:
+        mensual = pd.concat([resultado.como_dataframe() for resultado in resultados], ignore_index=True)
+        mensual.insert(0, "Licenciatura", _categorica(nombres, np.repeat(np.arange(len(nombres)), horizonte)))
+
+    resumen = pd.DataFrame({"Licenciatura": nombres})
+    for i, p in enumerate(PERCENTILES):
+        resumen[f"Utilidad acumulada P{p}"] = [r.utilidad_acumulada[i] for r in resultados]
+    resumen["Prob. pérdida acumulada"] = [r.prob_perdida_acumulada for r in resultados]
+    resumen["Prob. bajo equilibrio (último mes)"] = [r.prob_bajo_equilibrio[-1] for r in resultados]
+    return mensual, resumen
@@ -0,0 +1,73 @@
+"""Superficie de sensibilidad de la utilidad a colegiatura, matrícula y costo variable."""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SuperficieSensibilidad:
+    """Utilidad y margen de seguridad sobre una rejilla de cambios porcentuales.
+
+    ``utilidad`` y ``margen`` tienen forma (costo variable, colegiatura,
+    estudiantes). El margen de seguridad es la fracción de la matrícula que
+    puede perderse antes de llegar al punto de equilibrio; es ``NaN`` donde
+    la colegiatura no cubre el costo variable.
+    """
+    cambios_colegiatura: np.ndarray
+    cambios_estudiantes: np.ndarray
+    cambios_costo_variable: np.ndarray
+    utilidad: np.ndarray
+    margen: np.ndarray
+
+    def corte(self, cambio_costo_variable=0):
+        """Índice del corte de costo variable más cercano a ``cambio_costo_variable``."""
+        return int(np.abs(self.cambios_costo_variable - cambio_costo_variable).argmin())
+
+
+def rejilla(rango, puntos):
+    """``puntos`` cambios porcentuales equiespaciados entre -rango y +rango."""
+    return np.linspace(-rango, rango, puntos)
+
+
+def superficie_sensibilidad(estudiantes, colegiatura, costo_fijo, costo_variable,
+                            cambios_colegiatura, cambios_estudiantes, cambios_costo_variable=(0,), dtype=np.float32):
+    """Evalúa la rejilla completa en una sola operación vectorizada.
+
+    Acepta una licenciatura o arreglos de varias; en el segundo caso la
+    superficie es la de la cartera. Como la utilidad es bilineal en los
+    factores de colegiatura y matrícula, basta con tres sumas por
+    licenciatura antes de expandir la rejilla, así que el costo no depende
+    del número de licenciaturas.
+    """
+    estudiantes = np.atleast_1d(np.asarray(estudiantes, dtype=np.float64))
+    colegiatura = np.atleast_1d(np.asarray(colegiatura, dtype=np.float64))
+    costo_fijo = np.atleast_1d(np.asarray(costo_fijo, dtype=np.float64))
+    costo_variable = np.atleast_1d(np.asarray(costo_variable, dtype=np.float64))
+
+    # Mismo costo variable por alumno que simulaciones y proyecciones.
+    c_var_unit = np.divide(costo_variable, estudiantes, out=np.zeros_like(costo_variable), where=estudiantes > 0)
+    ingresos_base = float(np.sum(estudiantes * colegiatura))
+    variable_base = float(np.sum(estudiantes * c_var_unit))
+    fijo = float(np.sum(costo_fijo))
+
+    cambios_colegiatura = np.asarray(cambios_colegiatura, dtype=np.float64)
+    cambios_estudiantes = np.asarray(cambios_estudiantes, dtype=np.float64)
+    cambios_costo_variable = np.atleast_1d(np.asarray(cambios_costo_variable, dtype=np.float64))
+
+    factor_cv = (1 + cambios_costo_variable / 100)[:, None, None]
+    factor_col = (1 + cambios_colegiatura / 100)[None, :, None]
+    factor_est = np.maximum(0, 1 + cambios_estudiantes / 100)[None, None, :]
+
+    contribucion = factor_col * ingresos_base - factor_cv * variable_base
+    utilidad = factor_est * contribucion - fijo
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor_equilibrio = np.where(contribucion > 0, fijo / contribucion, np.nan)
+        margen = np.where(factor_est > 0, 1 - factor_equilibrio / factor_est, np.nan)
+
+    return SuperficieSensibilidad(
+        cambios_colegiatura=cambios_colegiatura,
+        cambios_estudiantes=cambios_estudiantes,
+        cambios_costo_variable=cambios_costo_variable,
+        utilidad=utilidad.astype(dtype, copy=False),
+        margen=margen.astype(dtype, copy=False),
+    )